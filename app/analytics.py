@@ -0,0 +1,252 @@
+"""
+Recommendation history analytics
+A background thread rolls recommendations up into hourly aggregates
+(requests per job role, exposures per test, top-score distribution) with
+GROUP BY queries over the indexed timestamp range that changed. Analytics
+endpoints read only the rollup table, never the raw history. Every worker
+starts the thread, but only the one holding a Postgres advisory lock runs
+the rollups; another worker takes over if that process goes away.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import case, func, select, text
+from sqlalchemy.orm import Session
+from app.database import SessionLocal, conflict_insert
+from app.models import Recommendation, RecommendationItem, RecommendationRollup
+
+# How often rollups are refreshed (0 disables the background thread)
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "60"))
+
+# Rollup metrics
+ROLE = "role"
+TEST = "test"
+SCORE = "score"
+
+# Top confidence score buckets: "0-10", "10-20", ..., "90-100"
+SCORE_BUCKETS = [f"{low}-{low + 10}" for low in range(0, 100, 10)]
+
+# Already rolled-up hours recomputed on every run, to catch history flushed late
+_RECOMPUTE_HOURS = 1
+
+# Advisory lock held by the one worker that runs the rollups
+_LEADER_LOCK = "recommendation_rollups"
+
+
+def _hour(column, dialect: str):
+    """Truncate a timestamp column to the hour"""
+    if dialect == "postgresql":
+        return func.date_trunc("hour", column)
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+
+def _to_hour(value) -> datetime:
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def _score_bucket(column):
+    """Bucket label of a 0-100 confidence score"""
+    score = func.coalesce(column, 0)
+    return case(
+        *[(score < (i + 1) * 10, label) for i, label in enumerate(SCORE_BUCKETS[:-1])],
+        else_=SCORE_BUCKETS[-1]
+    )
+
+
+def run_rollup(db: Session) -> Dict:
+    """
+    Recompute the hourly rollups from the last rolled-up hour onwards
+
+    Rows are upserted on (metric, hour, key), so a concurrent run or a
+    reader never sees the recomputed hours missing.
+    Returns the first hour recomputed and the number of rollup rows written.
+    """
+    started = time.perf_counter()
+    dialect = db.get_bind().dialect.name
+
+    latest = db.query(func.max(RecommendationRollup.hour)).scalar()
+    since = _to_hour(latest) - timedelta(hours=_RECOMPUTE_HOURS) if latest is not None else None
+
+    def grouped(metric, timestamp, key, score):
+        hour = _hour(timestamp, dialect)
+        query = select(hour, key, func.count(), func.coalesce(func.sum(score), 0)).group_by(hour, key)
+        if since is not None:
+            query = query.where(timestamp >= since)
+        return [
+            {'metric': metric, 'hour': _to_hour(h), 'key': k, 'count': count, 'score_sum': float(total)}
+            for h, k, count, total in db.execute(query)
+        ]
+
+    rows = (
+        grouped(ROLE, Recommendation.timestamp, func.trim(func.lower(Recommendation.job_role)), Recommendation.confidence_score)
+        + grouped(TEST, RecommendationItem.timestamp, RecommendationItem.test_name, RecommendationItem.confidence_score)
+        + grouped(SCORE, Recommendation.timestamp, _score_bucket(Recommendation.confidence_score), Recommendation.confidence_score)
+    )
+
+    # Recomputed hours only gain history, so every stale row is overwritten
+    if rows:
+        stmt = conflict_insert(db, RecommendationRollup.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['metric', 'hour', 'key'],
+            set_={'count': stmt.excluded['count'], 'score_sum': stmt.excluded['score_sum']}
+        )
+        db.execute(stmt, rows)
+    db.commit()
+
+    return {
+        "since": since.isoformat() if since else None,
+        "rows": len(rows),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def _window_start(hours: int) -> datetime:
+    """Start of the hour N - 1 hours ago (UTC), so the current hour counts as one"""
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+
+
+def _window(metric: str, hours: int):
+    """Per-key totals of one metric over the last N hours"""
+    since = _window_start(hours)
+    return (
+        select(RecommendationRollup.key, func.sum(RecommendationRollup.count), func.sum(RecommendationRollup.score_sum))
+        .where(RecommendationRollup.metric == metric, RecommendationRollup.hour >= since)
+        .group_by(RecommendationRollup.key)
+    )
+
+
+def top_keys(db: Session, metric: str, hours: int, limit: int) -> List[Dict]:
+    """Most frequent job roles or tests over the last N hours, with their mean score"""
+    query = _window(metric, hours).order_by(func.sum(RecommendationRollup.count).desc()).limit(limit)
+    return [
+        {"name": key, "count": count, "avg_confidence_score": round(score_sum / count, 2) if count else 0.0}
+        for key, count, score_sum in db.execute(query)
+    ]
+
+
+def score_distribution(db: Session, hours: int) -> Dict[str, int]:
+    """Requests per top-score bucket over the last N hours"""
+    counts = {key: count for key, count, _ in db.execute(_window(SCORE, hours))}
+    return {bucket: counts.get(bucket, 0) for bucket in SCORE_BUCKETS}
+
+
+def hourly_requests(db: Session, hours: int) -> List[Dict]:
+    """Requests per hour over the last N hours"""
+    since = _window_start(hours)
+    query = (
+        select(RecommendationRollup.hour, func.sum(RecommendationRollup.count))
+        .where(RecommendationRollup.metric == ROLE, RecommendationRollup.hour >= since)
+        .group_by(RecommendationRollup.hour)
+        .order_by(RecommendationRollup.hour)
+    )
+    return [{"hour": _to_hour(hour).isoformat(), "requests": count} for hour, count in db.execute(query)]
+
+
+class RollupWorker:
+    """Refreshes the rollups every ROLLUP_INTERVAL_SECONDS in a daemon thread, in one worker at a time"""
+
+    def __init__(self, session_factory=SessionLocal, interval: float = ROLLUP_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        # Connection holding the leader lock, kept out of the pool while this worker leads
+        self._leader_connection = None
+        self.leader = False
+        self.last_run: Optional[Dict] = None
+        self.failures = 0
+
+    def start(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._release_leadership()
+
+    def is_leader(self) -> bool:
+        """
+        Whether this worker runs the rollups, taking the leader lock if it is free
+
+        The lock is a session-level Postgres advisory lock on a dedicated
+        connection, so it is released when this process or its connection dies.
+        On SQLite every process leads; the upserts keep repeated runs harmless.
+        """
+        db = self.session_factory()
+        try:
+            bind = db.get_bind()
+        finally:
+            db.close()
+        if bind.dialect.name != "postgresql":
+            return True
+
+        if self._leader_connection is not None:
+            try:
+                self._leader_connection.execute(text("SELECT 1"))
+                self._leader_connection.commit()
+                return True
+            except Exception:
+                # Connection lost, and the lock with it
+                self._release_leadership()
+
+        connection = bind.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": _LEADER_LOCK}).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._leader_connection = connection
+        return True
+
+    def _release_leadership(self):
+        connection, self._leader_connection = self._leader_connection, None
+        if connection is not None:
+            try:
+                connection.invalidate()  # Closing the session releases the lock
+            except Exception:
+                pass
+
+    def run_once(self) -> Dict:
+        db = self.session_factory()
+        try:
+            self.last_run = {**run_rollup(db), "finished_at": datetime.now(timezone.utc).isoformat()}
+            return self.last_run
+        except Exception:
+            db.rollback()
+            self.failures += 1
+            raise
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.leader = self.is_leader()
+                if self.leader:
+                    self.run_once()
+            except Exception as e:
+                print(f"❌ Error rolling up recommendation history: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "leader": self.leader,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run,
+            "failures": self.failures
+        }
+
+
+# Global rollup worker
+rollup_worker = RollupWorker()
@@ -0,0 +1,268 @@
+"""
+Columnar assessment metadata
+Stores the per-assessment fields as flat NumPy arrays so the engine holds no
+Python object per assessment: free text as one UTF-8 buffer plus offsets,
+low-cardinality fields (category, difficulty) as integer codes into a small
+table of interned strings. The arrays are saved as .npy files and can be
+memory-mapped read-only by every worker. Records are only built as dicts
+for the rows a caller asks for, e.g. the final top-k of a recommendation,
+and a bounded cache keeps the decoded hot rows.
+"""
+import json
+import os
+import sys
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+INT_COLUMNS = ['id', 'duration_minutes']
+STRING_COLUMNS = ['test_name', 'test_description', 'skills_assessed']
+# Few distinct values: stored as codes, decoded to one shared str per value
+CODE_COLUMNS = ['category', 'difficulty_level']
+ASSESSMENT_FIELDS = ['id', 'test_name', 'test_description', 'category', 'skills_assessed', 'difficulty_level', 'duration_minutes']
+
+# Decoded rows kept per store, so popular assessments are decoded once (0 disables)
+ASSESSMENT_ROW_CACHE_SIZE = int(os.getenv("ASSESSMENT_ROW_CACHE_SIZE", "4096"))
+
+
+class ColumnarAssessments(Sequence):
+    """Read-only sequence of assessment dicts backed by column arrays"""
+
+    def __init__(
+        self,
+        int_columns: Dict[str, np.ndarray],
+        string_columns: Dict[str, tuple],
+        code_columns: Dict[str, Tuple[np.ndarray, List[str]]]
+    ):
+        # int_columns: name -> int64 array (-1 for NULL)
+        # string_columns: name -> (uint8 data buffer, int64 offsets, bool null mask)
+        # code_columns: name -> (int32 codes, -1 for NULL; interned values by code)
+        self.int_columns = int_columns
+        self.string_columns = string_columns
+        self.code_columns = {
+            column: (codes, [sys.intern(value) for value in values])
+            for column, (codes, values) in code_columns.items()
+        }
+
+        # Row lookups go through memoryviews: indexing one returns a plain int
+        # or bool and slicing copies nothing, both much cheaper than NumPy scalars
+        self._views = (
+            tuple(memoryview(self.int_columns[column]) for column in INT_COLUMNS),
+            tuple(tuple(memoryview(array) for array in self.string_columns[column]) for column in STRING_COLUMNS),
+            tuple((memoryview(codes), values) for codes, values in (self.code_columns[column] for column in CODE_COLUMNS))
+        )
+        # index -> decoded row; emptied when full, so it holds the recently hot rows
+        self._row_cache = {}
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> "ColumnarAssessments":
+        """Pack assessment dicts into columns"""
+        int_columns = {
+            column: np.array([-1 if r[column] is None else r[column] for r in records], dtype=np.int64)
+            for column in INT_COLUMNS
+        }
+
+        string_columns = {}
+        for column in STRING_COLUMNS:
+            values = [r[column] for r in records]
+            encoded = [(v or "").encode("utf-8") for v in values]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(e) for e in encoded])
+            string_columns[column] = (
+                np.frombuffer(b"".join(encoded), dtype=np.uint8),
+                offsets,
+                np.array([v is None for v in values], dtype=bool)
+            )
+
+        code_columns = {}
+        for column in CODE_COLUMNS:
+            table = {}
+            codes = np.array([
+                -1 if r[column] is None else table.setdefault(r[column], len(table))
+                for r in records
+            ], dtype=np.int32)
+            code_columns[column] = (codes, list(table))
+
+        return cls(int_columns, string_columns, code_columns)
+
+    def take(self, rows: np.ndarray, appended: Optional["ColumnarAssessments"] = None) -> "ColumnarAssessments":
+        """
+        New columns holding the given rows, in order
+
+        rows index this store's rows followed by appended's. Columns are copied
+        one run of consecutive rows at a time, so a patch that keeps most rows
+        in place costs a few slices per column, not a row-by-row rebuild.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        old_count = len(self)
+
+        # Runs of consecutive rows from the same store: (store, first, end)
+        breaks = (np.flatnonzero((np.diff(rows) != 1) | (rows[1:] == old_count)) + 1).tolist()
+        runs = []
+        for start, end in zip([0] + breaks, breaks + [len(rows)]):
+            if start == end:
+                continue
+            first = int(rows[start])
+            store = self
+            if first >= old_count:
+                store, first = appended, first - old_count
+            runs.append((store, first, first + end - start))
+
+        int_columns = {
+            column: _join([store.int_columns[column][a:b] for store, a, b in runs], np.int64)
+            for column in INT_COLUMNS
+        }
+
+        string_columns = {}
+        for column in STRING_COLUMNS:
+            data, lengths, nulls = [], [], []
+            for store, a, b in runs:
+                store_data, store_offsets, store_nulls = store.string_columns[column]
+                data.append(store_data[store_offsets[a]:store_offsets[b]])
+                lengths.append(np.diff(store_offsets[a:b + 1]))
+                nulls.append(store_nulls[a:b])
+            offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum(_join(lengths, np.int64), out=offsets[1:])
+            string_columns[column] = (_join(data, np.uint8), offsets, _join(nulls, bool))
+
+        code_columns = {}
+        for column in CODE_COLUMNS:
+            values = list(self.code_columns[column][1])
+            recode = {id(self): None}
+            if appended is not None:
+                # Appended values join the value table; known values keep their code
+                table = {value: code for code, value in enumerate(values)}
+                recode[id(appended)] = np.array(
+                    [table.setdefault(value, len(table)) for value in appended.code_columns[column][1]] + [-1],
+                    dtype=np.int32
+                )
+                values = list(table)
+            pieces = []
+            for store, a, b in runs:
+                store_codes = np.asarray(store.code_columns[column][0][a:b])
+                mapping = recode[id(store)]
+                pieces.append(store_codes if mapping is None else mapping[store_codes])
+            codes = _join(pieces, np.int32)
+
+            # Drop values no row uses any more, so masks and facets only list live ones
+            used = np.bincount(codes[codes >= 0], minlength=len(values)) > 0
+            if not used.all():
+                recoded = np.append(np.cumsum(used, dtype=np.int32) - 1, np.int32(-1))
+                codes = recoded[codes]
+                values = [value for value, keep in zip(values, used.tolist()) if keep]
+            code_columns[column] = (codes, values)
+
+        return ColumnarAssessments(int_columns, string_columns, code_columns)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> "ColumnarAssessments":
+        """Load columns saved by save(), memory-mapped by default"""
+        def load_array(name):
+            return np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+
+        int_columns = {column: load_array(f"{column}.npy") for column in INT_COLUMNS}
+        string_columns = {
+            column: (
+                load_array(f"{column}.data.npy"),
+                load_array(f"{column}.offsets.npy"),
+                load_array(f"{column}.null.npy")
+            )
+            for column in STRING_COLUMNS
+        }
+        code_columns = {}
+        for column in CODE_COLUMNS:
+            with open(os.path.join(directory, f"{column}.values.json")) as f:
+                code_columns[column] = (load_array(f"{column}.codes.npy"), json.load(f))
+        return cls(int_columns, string_columns, code_columns)
+
+    def save(self, directory: str):
+        """Write one .npy file per array, and the value table of each coded column"""
+        os.makedirs(directory, exist_ok=True)
+
+        for column, values in self.int_columns.items():
+            np.save(os.path.join(directory, f"{column}.npy"), values)
+
+        for column, (data, offsets, nulls) in self.string_columns.items():
+            np.save(os.path.join(directory, f"{column}.data.npy"), data)
+            np.save(os.path.join(directory, f"{column}.offsets.npy"), offsets)
+            np.save(os.path.join(directory, f"{column}.null.npy"), nulls)
+
+        for column, (codes, values) in self.code_columns.items():
+            np.save(os.path.join(directory, f"{column}.codes.npy"), codes)
+            with open(os.path.join(directory, f"{column}.values.json"), "w") as f:
+                json.dump(values, f)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.int_columns['id']
+
+    def __len__(self) -> int:
+        return len(self.int_columns['id'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = int(index)
+        if index < 0:
+            index += len(self)
+
+        if ASSESSMENT_ROW_CACHE_SIZE <= 0:
+            return self._decode(index)
+        record = self._row_cache.get(index)
+        if record is None:
+            record = self._decode(index)
+            if len(self._row_cache) >= ASSESSMENT_ROW_CACHE_SIZE:
+                self._row_cache.clear()
+            self._row_cache[index] = record
+        # Callers add their scores to the dict, so each gets its own copy
+        return record.copy()
+
+    def _decode(self, index: int) -> Dict:
+        """One row as a dict, field by field; the per-hit cost of every recommendation"""
+        (ids, durations), (names, descriptions, skills), (categories, difficulty_levels) = self._views
+        category, difficulty_level, duration = categories[0][index], difficulty_levels[0][index], durations[index]
+        return {
+            'id': ids[index],
+            'test_name': _text(names, index),
+            'test_description': _text(descriptions, index),
+            'category': None if category < 0 else categories[1][category],
+            'skills_assessed': _text(skills, index),
+            'difficulty_level': None if difficulty_level < 0 else difficulty_levels[1][difficulty_level],
+            'duration_minutes': None if duration < 0 else duration
+        }
+
+    def column(self, name: str) -> list:
+        """Every value of one column, without building the other fields"""
+        if name in self.int_columns:
+            return [None if value < 0 else value for value in self.int_columns[name].tolist()]
+
+        if name in self.code_columns:
+            codes, values = self.code_columns[name]
+            return [None if code < 0 else values[code] for code in codes.tolist()]
+
+        data, offsets, nulls = self.string_columns[name]
+        buffer = data.tobytes()
+        bounds = offsets.tolist()
+        return [
+            None if null else buffer[bounds[i]:bounds[i + 1]].decode("utf-8")
+            for i, null in enumerate(nulls.tolist())
+        ]
+
+    def to_records(self) -> List[Dict]:
+        """Materialize every assessment as a dict, one column at a time"""
+        columns = [self.column(field) for field in ASSESSMENT_FIELDS]
+        return [dict(zip(ASSESSMENT_FIELDS, values)) for values in zip(*columns)]
+
+
+def _text(views: tuple, index: int) -> Optional[str]:
+    data, offsets, nulls = views
+    return None if nulls[index] else str(data[offsets[index]:offsets[index + 1]], "utf-8")
+
+
+def _join(pieces: List[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(pieces).astype(dtype, copy=False) if pieces else np.zeros(0, dtype=dtype)
+
+
+# Metadata of an engine with no model
+EMPTY_ASSESSMENTS = ColumnarAssessments.from_records([])
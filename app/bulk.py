@@ -0,0 +1,182 @@
+"""
+Bulk recommendations for uploaded job-role files
+Reads CSV or NDJSON job roles lazily, scores them in fixed-size chunks and
+yields NDJSON result lines as they are produced, so memory stays bounded
+however large the input is.
+
+Input formats (UTF-8, optionally with a BOM):
+    csv    - header row with a job_role (or role_name) column; otherwise the first column
+    ndjson - one JSON object per line with a job_role (or role_name) key, or a JSON string
+
+Lines are decoded one at a time, so a line that is not valid UTF-8 or not
+valid JSON gets its own error line in the output and the export goes on.
+"""
+import csv
+import itertools
+import json
+import os
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+from app.ml_model import RecommendationEngine
+
+# Job roles scored per recommend_batch() call
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "256"))
+
+# Same limits as RecommendationRequest.job_role
+MIN_JOB_ROLE_LENGTH = 2
+MAX_JOB_ROLE_LENGTH = 255
+
+JOB_ROLE_KEYS = ("job_role", "role_name")
+
+
+class InvalidRow:
+    """An input row that could not be read, with the error reported for it"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+INVALID_UTF8 = InvalidRow("invalid UTF-8")
+INVALID_JSON = InvalidRow("invalid JSON")
+
+# One job role, None for a row without one, or the reason the row was unreadable
+JobRoleRow = Union[str, None, InvalidRow]
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Guess csv or ndjson from a file name or content type"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")) or "json" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def read_job_roles(stream: BinaryIO, fmt: str) -> Iterator[JobRoleRow]:
+    """Yield one job role per input row of a binary stream (None for rows without one)"""
+    if fmt == "ndjson":
+        yield from _read_ndjson(stream)
+    elif fmt == "csv":
+        yield from _read_csv(stream)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _decode_lines(stream: BinaryIO) -> Iterator[Optional[str]]:
+    """Each line of the stream as text, or None when it is not valid UTF-8"""
+    encoding = "utf-8-sig"  # Drops a BOM at the start of the file
+    for raw in stream:
+        try:
+            yield raw.decode(encoding, errors="strict")
+        except UnicodeDecodeError:
+            yield None
+        encoding = "utf-8"
+
+
+def _read_csv(stream: BinaryIO) -> Iterator[JobRoleRow]:
+    # An undecodable line reaches the csv reader as an empty line; the row it
+    # ends up in is reported as invalid
+    invalid = []
+
+    def lines():
+        for line in _decode_lines(stream):
+            if line is None:
+                invalid.append(True)
+                line = "\n"
+            yield line
+
+    def rows():
+        for row in csv.reader(lines()):
+            yield INVALID_UTF8 if invalid else row
+            invalid.clear()
+
+    reader = rows()
+    header = next(reader, None)
+    if header is None:
+        return
+
+    column = None
+    if not isinstance(header, InvalidRow):
+        columns = [c.strip().lower() for c in header]
+        column = next((columns.index(key) for key in JOB_ROLE_KEYS if key in columns), None)
+    if column is None:
+        # No recognised header: the first row is data and the first column holds the role
+        column = 0
+        yield header if isinstance(header, InvalidRow) else (header[0] if header else None)
+
+    for row in reader:
+        if isinstance(row, InvalidRow):
+            yield row
+        else:
+            yield row[column] if len(row) > column else None
+
+
+def _read_ndjson(stream: BinaryIO) -> Iterator[JobRoleRow]:
+    for line in _decode_lines(stream):
+        if line is None:
+            yield INVALID_UTF8
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield INVALID_JSON
+            continue
+
+        if isinstance(value, dict):
+            value = next((value[key] for key in JOB_ROLE_KEYS if key in value), None)
+        yield value if isinstance(value, str) else None
+
+
+def stream_recommendations(
+    engine: RecommendationEngine,
+    job_roles: Iterable[JobRoleRow],
+    top_k: int = 5,
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Yield one NDJSON line per input row, in input order
+
+    Only one chunk of job roles and its results are held at a time. Invalid
+    rows produce an error line instead of stopping the export.
+    """
+    rows = enumerate(job_roles, start=1)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        valid = [(row, role.strip()) for row, role in chunk if _valid_job_role(role)]
+        scored = dict(zip(
+            (row for row, _ in valid),
+            engine.recommend_batch([role for _, role in valid], top_k=top_k) if valid else []
+        ))
+
+        lines = []
+        for row, role in chunk:
+            if row in scored:
+                result = {"row": row, "job_role": role.strip(), "recommendations": _to_results(scored[row])}
+            elif isinstance(role, InvalidRow):
+                result = {"row": row, "job_role": None, "error": role.error}
+            else:
+                result = {"row": row, "job_role": role, "error": "job_role must be 2-255 characters"}
+            lines.append(json.dumps(result) + "\n")
+        yield "".join(lines)
+
+
+def _valid_job_role(role: Optional[str]) -> bool:
+    return isinstance(role, str) and MIN_JOB_ROLE_LENGTH <= len(role.strip()) <= MAX_JOB_ROLE_LENGTH
+
+
+def _to_results(recommendations: List[Dict]) -> List[Dict]:
+    """Same fields as the RecommendedTest response schema"""
+    return [
+        {
+            "test_name": rec['test_name'],
+            "test_description": rec['test_description'],
+            "category": rec['category'],
+            "confidence_score": rec['confidence_score'],
+            "skills_match": rec['skills_assessed']
+        }
+        for rec in recommendations
+    ]
@@ -1,8 +1,16 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
+import threading
+import time
+from typing import Dict
 from dotenv import load_dotenv
+from app.metrics import Histogram
 
 # Load environment variables
 load_dotenv()
@@ -10,8 +18,86 @@ load_dotenv()
 # Get database URL from .env
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Connection pool settings (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Time spent waiting for a pooled connection, in seconds
+pool_acquire_latency = Histogram()
+pool_counters = {"connects": 0, "invalidations": 0, "timeouts": 0}
+_pool_counters_lock = threading.Lock()
+
+# When the current thread asked the pool for a connection
+_checkout_started = threading.local()
+
+
+def _count(name: str):
+    with _pool_counters_lock:
+        pool_counters[name] += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that notes when a checkout starts
+
+    The wait is recorded by the "checkout" event once a connection is handed
+    out, or here when the checkout times out.
+    """
+
+    def connect(self):
+        _checkout_started.value = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            _count("timeouts")
+            pool_acquire_latency.observe(time.perf_counter() - _checkout_started.value)
+            raise
+        finally:
+            _checkout_started.value = None
+
+
+def _engine_options(url: str) -> Dict:
+    """Pool options for the configured database"""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    # In-memory SQLite is tied to a single connection, keep SQLAlchemy's default pool
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE
+    )
+    return options
+
+
 # Create database engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+
+@event.listens_for(engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    _count("connects")
+
+
+@event.listens_for(engine, "checkout")
+def _observe_checkout(dbapi_connection, connection_record, connection_proxy):
+    started = getattr(_checkout_started, "value", None)
+    if started is not None:
+        pool_acquire_latency.observe(time.perf_counter() - started)
+
+
+@event.listens_for(engine, "invalidate")
+def _count_invalidate(dbapi_connection, connection_record, exception):
+    _count("invalidations")
+
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -26,4 +112,70 @@ def get_db():
         yield db
     finally:
         db.close()
- 
+
+
+def conflict_insert(db, table):
+    """INSERT for the session's database that supports on_conflict_do_nothing/do_update"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise ValueError(f"ON CONFLICT inserts need PostgreSQL or SQLite, not {dialect}")
+
+
+def advisory_lock(db, name: str, wait: bool = True) -> bool:
+    """
+    Take a Postgres advisory lock held until the session's transaction ends
+
+    Serializes work across worker processes. With wait=False, returns False
+    instead of blocking when another transaction holds the lock. Always True
+    on SQLite, which allows one writer at a time anyway.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    if wait:
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"), {"name": name}).scalar())
+
+
+def check_database() -> Dict:
+    """Run SELECT 1 on a pooled connection and report the round-trip time"""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return {
+            "status": "connected",
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def get_pool_stats() -> Dict:
+    """Return live connection pool statistics for this worker"""
+    pool = engine.pool
+    with _pool_counters_lock:
+        counters = dict(pool_counters)
+    stats = {
+        "pid": os.getpid(),
+        "pool_class": type(pool).__name__,
+        "pre_ping": DB_POOL_PRE_PING,
+        **counters
+    }
+
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            max_overflow=DB_MAX_OVERFLOW,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            timeout_seconds=pool.timeout(),
+            recycle_seconds=DB_POOL_RECYCLE
+        )
+
+    stats["acquire_latency_seconds"] = pool_acquire_latency.snapshot()
+    return stats
@@ -0,0 +1,162 @@
+"""
+Filtered retrieval over the assessment catalog
+Every model snapshot carries FilterMasks: one boolean mask per category and
+per difficulty level, plus the row order of the catalog sorted by duration.
+A request's filters are turned into a single row mask (cached per filter
+combination) that the search index applies before top-k selection, so a
+filtered query scores no more rows than an unfiltered one.
+"""
+import dataclasses
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.assessment_store import ColumnarAssessments
+from app.cache import LRUCache
+
+# Combined masks kept per snapshot, one per distinct filter combination
+FILTER_MASK_CACHE_SIZE = 256
+
+
+@dataclasses.dataclass(frozen=True)
+class AssessmentFilter:
+    """Restrictions on the assessments a recommendation may return; None means any"""
+    category: Optional[str] = None
+    difficulty_level: Optional[str] = None
+    min_duration_minutes: Optional[int] = None
+    max_duration_minutes: Optional[int] = None
+
+    @property
+    def active(self) -> bool:
+        return any(value is not None for value in dataclasses.astuple(self))
+
+    def key(self) -> tuple:
+        """Case-insensitive identity of the filter, used in cache keys"""
+        return (
+            _normalize(self.category),
+            _normalize(self.difficulty_level),
+            self.min_duration_minutes,
+            self.max_duration_minutes
+        )
+
+
+NO_FILTER = AssessmentFilter()
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower() if value is not None else None
+
+
+class FilterMasks:
+    """Precomputed per-value masks and duration order for one snapshot's rows"""
+
+    def __init__(
+        self,
+        assessments: ColumnarAssessments,
+        value_masks: Optional[Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]] = None,
+        duration_order: Optional[np.ndarray] = None
+    ):
+        self.size = len(assessments)
+        if value_masks is None:
+            value_masks = (
+                self._value_masks(*assessments.code_columns['category']),
+                self._value_masks(*assessments.code_columns['difficulty_level'])
+            )
+        self.categories, self.difficulty_levels = value_masks
+
+        # Rows without a duration sort first as -1 and never match a duration filter
+        durations = np.asarray(assessments.int_columns['duration_minutes'])
+        if duration_order is None:
+            duration_order = np.argsort(durations, kind='stable')
+        self.duration_order = duration_order
+        self.durations_sorted = durations[self.duration_order]
+
+        self._cache = LRUCache(max_size=FILTER_MASK_CACHE_SIZE, ttl_seconds=float("inf"))
+
+    def patched(self, assessments: ColumnarAssessments, rows: np.ndarray) -> "FilterMasks":
+        """
+        Masks for assessments, built by ColumnarAssessments.take(rows, appended)
+
+        Kept rows move their mask bits and their place in the duration order;
+        only the appended rows are looked up and inserted.
+        """
+        from_old = rows < self.size
+        fresh = np.flatnonzero(~from_old)
+        source = np.where(from_old, rows, 0)
+
+        value_masks = []
+        for masks, column in ((self.categories, 'category'), (self.difficulty_levels, 'difficulty_level')):
+            patched = {}
+            for key, mask in masks.items():
+                patched[key] = mask[source]
+                patched[key][fresh] = False
+            codes, values = assessments.code_columns[column]
+            fresh_codes = np.asarray(codes)[fresh]
+            for code, value in enumerate(values):
+                key = _normalize(value)
+                hits = fresh[fresh_codes == code]
+                if key and len(hits):
+                    patched.setdefault(key, np.zeros(len(rows), dtype=bool))[hits] = True
+            value_masks.append({key: mask for key, mask in patched.items() if mask.any()})
+
+        # Kept rows in their old duration order, then each appended row at its place
+        moved = np.full(self.size, -1, dtype=np.int64)
+        moved[rows[from_old]] = np.flatnonzero(from_old)
+        order = moved[self.duration_order]
+        order = order[order >= 0]
+        if len(fresh):
+            durations = np.asarray(assessments.int_columns['duration_minutes'])
+            fresh = fresh[np.argsort(durations[fresh], kind='stable')]
+            order = np.insert(order, np.searchsorted(durations[order], durations[fresh], side='right'), fresh)
+
+        return FilterMasks(assessments, tuple(value_masks), order)
+
+    def _value_masks(self, codes: np.ndarray, values: List[str]) -> Dict[str, np.ndarray]:
+        """Mask per value of a coded column; values differing only in case share one"""
+        masks = {}
+        for code, value in enumerate(values):
+            key = _normalize(value)
+            if not key:
+                continue
+            match = codes == code
+            masks[key] = masks[key] | match if key in masks else match
+        return masks
+
+    def mask(self, filters: AssessmentFilter) -> Optional[np.ndarray]:
+        """Rows matching every filter, or None when nothing is filtered"""
+        if not filters.active:
+            return None
+
+        key = filters.key()
+        mask = self._cache.get(key)
+        if mask is None:
+            mask = self._build(*key)
+            mask.setflags(write=False)
+            self._cache.set(key, mask)
+        return mask
+
+    def _build(self, category, difficulty_level, min_duration, max_duration) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for value, masks in ((category, self.categories), (difficulty_level, self.difficulty_levels)):
+            if value is not None:
+                value_mask = masks.get(value)
+                if value_mask is None:
+                    return np.zeros(self.size, dtype=bool)
+                mask &= value_mask
+
+        if min_duration is not None or max_duration is not None:
+            # Rows in [min, max] are one contiguous run of the sorted durations
+            start = np.searchsorted(self.durations_sorted, max(min_duration or 0, 0), side='left')
+            end = (
+                np.searchsorted(self.durations_sorted, max_duration, side='right')
+                if max_duration is not None else self.size
+            )
+            in_range = np.zeros(self.size, dtype=bool)
+            in_range[self.duration_order[start:end]] = True
+            mask &= in_range
+
+        return mask
+
+    def describe(self) -> Dict:
+        return {
+            "categories": sorted(self.categories),
+            "difficulty_levels": sorted(self.difficulty_levels)
+        }
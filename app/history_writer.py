@@ -0,0 +1,193 @@
+"""
+Background writer for recommendation history
+Queues Recommendation rows in memory and flushes them with bulk inserts,
+so /recommend never waits on a database round trip. Each recommended test
+is also written to recommendation_items for analytics.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from app.database import SessionLocal
+from app.models import Recommendation, RecommendationItem
+from app.metrics import span
+
+# Writer settings
+HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "10000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+HISTORY_FLUSH_INTERVAL_SECONDS = float(os.getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "2"))
+# How long submit() may wait for room in a full queue before dropping (0 = never wait)
+HISTORY_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("HISTORY_ENQUEUE_TIMEOUT_SECONDS", "0"))
+
+# Longest the writer thread sleeps before re-checking for shutdown
+_POLL_SECONDS = 0.25
+
+
+class HistoryWriter:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue_size: int = HISTORY_QUEUE_SIZE,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL_SECONDS,
+        enqueue_timeout: float = HISTORY_ENQUEUE_TIMEOUT_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Stop the flush thread and write out everything still queued"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        # Anything submitted after the thread exited is written here
+        self.flush()
+
+    def submit(self, job_role: str, recommended_tests: List[str], confidence_score: float, scores: Optional[List[float]] = None) -> bool:
+        """
+        Queue one recommendation record
+
+        scores holds the confidence score of each recommended test, in order.
+        Returns False when the queue is full and the record was dropped.
+        """
+        record = {
+            'job_role': job_role,
+            'recommended_tests': json.dumps(recommended_tests),
+            'confidence_score': confidence_score,
+            'timestamp': datetime.now(timezone.utc),
+            'items': list(zip(recommended_tests, scores or [None] * len(recommended_tests)))
+        }
+
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put(record, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self):
+        """Synchronously write every queued record"""
+        while True:
+            batch = self._take(self.batch_size, timeout=0)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _run(self):
+        """Flush when a batch fills up or the flush interval passes"""
+        while not self._stop.is_set():
+            batch = self._take(self.batch_size, timeout=self.flush_interval)
+            if batch:
+                self._write(batch)
+
+        # Drain on shutdown so queued records are not lost
+        self.flush()
+
+    def _take(self, max_items: int, timeout: float) -> List[Dict]:
+        """Collect up to max_items records, waiting at most timeout seconds"""
+        batch = []
+        deadline = time.monotonic() + timeout
+
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=min(remaining, _POLL_SECONDS)))
+            except queue.Empty:
+                if remaining <= 0 or self._stop.is_set():
+                    break
+
+        return batch
+
+    def _write(self, batch: List[Dict]):
+        """Insert one batch of recommendations and their items, one executemany each"""
+        db = self.session_factory()
+        try:
+            with span("history_write"):
+                rows = [{key: value for key, value in record.items() if key != 'items'} for record in batch]
+                ids = db.scalars(
+                    insert(Recommendation).returning(Recommendation.id, sort_by_parameter_order=True),
+                    rows
+                ).all()
+
+                items = [
+                    {
+                        'recommendation_id': recommendation_id,
+                        'rank': rank,
+                        'test_name': test_name,
+                        'confidence_score': score,
+                        'timestamp': record['timestamp']
+                    }
+                    for recommendation_id, record in zip(ids, batch)
+                    for rank, (test_name, score) in enumerate(record['items'], start=1)
+                ]
+                if items:
+                    db.execute(insert(RecommendationItem), items)
+                db.commit()
+            with self._lock:
+                self.written += len(batch)
+                self.flushes += 1
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self.failed += len(batch)
+            print(f"❌ Error writing recommendation history: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        """Return queue depth and write/drop counters"""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes
+        }
+
+
+# Global writer instance
+history_writer = HistoryWriter()
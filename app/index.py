@@ -0,0 +1,415 @@
+"""
+Search indexes over the normalized assessment matrix
+The engine asks its index for the top-k candidates of each query instead of
+scoring rows itself. The backend is chosen with MODEL_INDEX_BACKEND:
+    exact    - brute-force dot product against every assessment
+    inverted - term posting lists; only assessments sharing a query term are scored
+    ivf      - k-means clustered index that only scores the nprobe closest clusters
+Indexes expose their arrays through state() so saved artifacts can restore
+(and memory-map) them without rebuilding. search() takes an optional boolean row mask (see
+app.filters); rows outside it are dropped before top-k selection.
+"""
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from app.metrics import span
+
+MODEL_INDEX_BACKEND = os.getenv("MODEL_INDEX_BACKEND", "inverted").lower()
+# Number of clusters (0 picks about 4 * sqrt(catalog size))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+# Clusters scored per query; higher is slower but closer to exact
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+# Catalogs smaller than this always use the exact index
+IVF_MIN_ROWS = int(os.getenv("IVF_MIN_ROWS", "5000"))
+
+# Rows assigned to clusters per matrix product
+_ASSIGN_CHUNK_ROWS = 65536
+# K-means is fitted on at most this many rows per cluster
+_TRAIN_ROWS_PER_CLUSTER = 64
+# Dimensions of the space the IVF k-means is fitted in
+_SVD_COMPONENTS = 32
+
+# One (indices, scores) pair per query, best first
+SearchResults = List[Tuple[np.ndarray, np.ndarray]]
+
+
+def _dense(matrix) -> np.ndarray:
+    return matrix.toarray() if sparse.issparse(matrix) else np.asarray(matrix)
+
+
+def _transposed(matrix):
+    """
+    Row-major copy of matrix.T
+
+    A plain .T is column-major (or CSC), and scipy copies it on every
+    sparse-query product; storing the transpose once avoids that.
+    """
+    if sparse.issparse(matrix):
+        return sparse.csr_matrix(matrix.T, dtype=np.float32)
+    return np.ascontiguousarray(np.asarray(matrix, dtype=np.float32).T)
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return the indices of the top K scores per row, best first"""
+    k = min(top_k, scores.shape[1])
+    # Partial selection is O(n) per row; only the k winners get sorted
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _patch_postings(indptr, indices, data, rows: np.ndarray, old_count: int, appended) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Posting lists (CSC columns of the matrix) after a row patch
+
+    rows gives the source of each row of the patched matrix: an old row below
+    old_count, or row (i - old_count) of appended. Kept old rows must stay in
+    their relative order, as upserts (replace in place, append at the end) and
+    removals leave them, so every list stays sorted without a re-sort.
+    """
+    from_old = rows < old_count
+    kept_rows, kept_targets = rows[from_old], np.flatnonzero(from_old)
+
+    # Drop the postings of replaced and removed rows
+    dropped = np.ones(old_count, dtype=bool)
+    dropped[kept_rows] = False
+    gone = np.flatnonzero(dropped[indices])
+    if len(gone):
+        terms = np.searchsorted(indptr, gone, side='right') - 1
+        removed = np.zeros(len(indptr), dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(indptr) - 1), out=removed[1:])
+        indptr = indptr - removed
+        indices = np.delete(indices, gone)
+        data = np.delete(data, gone)
+
+    # Renumber the rest if removals shifted them
+    if not np.array_equal(kept_rows, kept_targets):
+        moved = np.zeros(old_count, dtype=indices.dtype)
+        moved[kept_rows] = kept_targets
+        indices = moved[indices]
+
+    fresh = np.flatnonzero(~from_old)
+    if not len(fresh):
+        return indptr, indices, data
+    block = sparse.csc_matrix(appended[rows[fresh] - old_count], dtype=np.float32)
+    if not block.nnz:
+        return indptr, indices, data
+    block.sort_indices()
+
+    # Each new posting goes to its row's place in its term's list
+    positions, new_rows, new_data = [], [], []
+    for term in np.flatnonzero(np.diff(block.indptr)):
+        a, b = block.indptr[term], block.indptr[term + 1]
+        term_rows = fresh[block.indices[a:b]]
+        start, end = indptr[term], indptr[term + 1]
+        positions.append(start + np.searchsorted(indices[start:end], term_rows))
+        new_rows.append(term_rows)
+        new_data.append(block.data[a:b])
+    positions = np.concatenate(positions)
+    indices = np.insert(indices, positions, np.concatenate(new_rows).astype(indices.dtype))
+    data = np.insert(data, positions, np.concatenate(new_data))
+    added = np.zeros(len(indptr), dtype=np.int64)
+    np.cumsum(np.diff(block.indptr), out=added[1:])
+    return indptr + added, indices, data
+
+
+class ExactIndex:
+    """Scores every assessment; the reference for approximate backends"""
+
+    name = "exact"
+
+    def __init__(self, vectors, state: Optional[Dict[str, np.ndarray]] = None):
+        self.vectors = vectors
+        if state is None:
+            self.vectors_T = _transposed(vectors)
+        elif "vectors_T" in state:
+            self.vectors_T = state["vectors_T"]
+        else:
+            self.vectors_T = sparse.csr_matrix(
+                (state["data"], state["indices"], state["indptr"]),
+                shape=(vectors.shape[1], vectors.shape[0]),
+                copy=False
+            )
+
+    def score(self, query_vectors) -> np.ndarray:
+        """
+        Cosine similarity of each query against every assessment
+
+        Both sides are L2-normalized, so this is a single dot product.
+        """
+        return _dense(query_vectors.astype(np.float32) @ self.vectors_T)
+
+    def search(self, query_vectors, top_k: int, mask: Optional[np.ndarray] = None) -> SearchResults:
+        with span("similarity"):
+            scores = self.score(query_vectors)
+            if mask is not None:
+                # Excluded rows score 0 and are never returned as matches
+                np.multiply(scores, mask, out=scores)
+        with span("top_k"):
+            top = top_k_indices(scores, top_k)
+        return [(indices, row[indices]) for row, indices in zip(scores, top)]
+
+    def patched(self, vectors, rows: np.ndarray, appended) -> "ExactIndex":
+        """Index over vectors, the matrix after a row patch (see _patch_postings)"""
+        if not sparse.issparse(self.vectors_T):
+            return ExactIndex(vectors)
+        # The CSR transpose holds the matrix's columns, like posting lists
+        indptr, indices, data = _patch_postings(
+            self.vectors_T.indptr, self.vectors_T.indices, self.vectors_T.data,
+            rows, self.vectors.shape[0], appended
+        )
+        return ExactIndex(vectors, state={"indptr": indptr, "indices": indices, "data": data})
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """The stored transpose, so workers map it instead of each building a copy"""
+        if sparse.issparse(self.vectors_T):
+            return {"indptr": self.vectors_T.indptr, "indices": self.vectors_T.indices, "data": self.vectors_T.data}
+        return {"vectors_T": self.vectors_T}
+
+    def describe(self) -> Dict:
+        return {"backend": self.name}
+
+
+class InvertedIndex:
+    """
+    Exact scoring through posting lists: term -> (assessment rows, weights)
+
+    Job-role queries only have a handful of terms, so a query accumulates
+    scores over their posting lists and never touches unrelated assessments.
+    Posting lists are the columns of the assessment matrix in CSC layout.
+    """
+
+    name = "inverted"
+
+    def __init__(self, vectors, state: Optional[Dict[str, np.ndarray]] = None):
+        self.vectors = vectors
+
+        if state is None:
+            postings = sparse.csc_matrix(vectors, dtype=np.float32)
+            postings.sort_indices()
+            state = {"indptr": postings.indptr, "indices": postings.indices, "data": postings.data}
+        self.indptr = state["indptr"]
+        self.indices = state["indices"]
+        self.data = state["data"]
+
+    def search(self, query_vectors, top_k: int, mask: Optional[np.ndarray] = None) -> SearchResults:
+        query_vectors = sparse.csr_matrix(query_vectors, dtype=np.float32)
+        if query_vectors.shape[0] > 1:
+            return self._search_batch(query_vectors, top_k, mask)
+
+        start, end = query_vectors.indptr[0], query_vectors.indptr[1]
+        terms = query_vectors.indices[start:end]
+        weights = query_vectors.data[start:end]
+
+        # Gather the posting lists of the query terms, scaled by the query weights
+        postings = [(self.indptr[term], self.indptr[term + 1], w) for term, w in zip(terms, weights)]
+        postings = [posting for posting in postings if posting[1] > posting[0]]
+        if not postings:
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))]
+
+        with span("similarity"):
+            rows = np.concatenate([self.indices[a:b] for a, b, _ in postings])
+            contributions = np.concatenate([self.data[a:b] * w for a, b, w in postings])
+
+            # Sum the contributions per assessment; only touched rows are scored
+            candidates, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+        return [self._top(candidates, scores, top_k, mask)]
+
+    def _search_batch(self, query_vectors: sparse.csr_matrix, top_k: int, mask: Optional[np.ndarray]) -> SearchResults:
+        """
+        Many queries in one sparse product against the posting lists
+
+        The CSC postings are the transposed matrix in CSR layout, so each row
+        of the product holds exactly the assessments its query touches.
+        """
+        with span("similarity"):
+            transposed = sparse.csr_matrix(
+                (self.data, self.indices, self.indptr),
+                shape=(self.vectors.shape[1], self.vectors.shape[0]),
+                copy=False
+            )
+            scores = (query_vectors @ transposed).tocsr()
+
+        return [
+            self._top(scores.indices[scores.indptr[row]:scores.indptr[row + 1]],
+                      scores.data[scores.indptr[row]:scores.indptr[row + 1]], top_k, mask)
+            for row in range(scores.shape[0])
+        ]
+
+    @staticmethod
+    def _top(candidates: np.ndarray, scores: np.ndarray, top_k: int, mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Best top_k of the scored candidates that pass the mask"""
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+        if not len(candidates):
+            return candidates, scores
+        with span("top_k"):
+            top = top_k_indices(scores[np.newaxis, :], top_k)[0]
+        return candidates[top], scores[top]
+
+    def patched(self, vectors, rows: np.ndarray, appended) -> "InvertedIndex":
+        """Index over vectors, the matrix after a row patch (see _patch_postings)"""
+        indptr, indices, data = _patch_postings(self.indptr, self.indices, self.data, rows, self.vectors.shape[0], appended)
+        return InvertedIndex(vectors, state={"indptr": indptr, "indices": indices, "data": data})
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"indptr": self.indptr, "indices": self.indices, "data": self.data}
+
+    def describe(self) -> Dict:
+        return {"backend": self.name, "postings": int(len(self.indices))}
+
+
+class IVFIndex:
+    """
+    Inverted-file index: assessments are grouped by their nearest k-means
+    centroid, and a query only scores the members of its nprobe closest clusters
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        vectors,
+        centroids: Optional[np.ndarray] = None,
+        nlist: int = IVF_NLIST,
+        nprobe: int = IVF_NPROBE,
+        labels: Optional[np.ndarray] = None,
+        state: Optional[Dict[str, np.ndarray]] = None
+    ):
+        self.vectors = vectors
+        self.nprobe = nprobe
+
+        if state is not None:
+            # Saved centroids and cluster lists: nothing to fit or assign
+            self.centroids, self.centroids_T = state["centroids"], state["centroids_T"]
+            self.order, self.offsets = state["order"], state["offsets"]
+            return
+
+        if centroids is None:
+            total = vectors.shape[0]
+            nlist = min(nlist or max(1, int(4 * math.sqrt(total))), total)
+            # A random sample is enough to place the centroids
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(total, min(total, nlist * _TRAIN_ROWS_PER_CLUSTER), replace=False))
+            from sklearn.cluster import MiniBatchKMeans
+            from sklearn.decomposition import TruncatedSVD
+            from sklearn.preprocessing import normalize
+            # k-means runs in a small SVD space: on the raw per-field vocabularies every
+            # step updates nlist x features dense centers. The centers are mapped back
+            # to the full space, where rows are assigned and queries are probed.
+            training = vectors[sample]
+            components = min(_SVD_COMPONENTS, training.shape[1] - 1)
+            svd = TruncatedSVD(n_components=components, n_iter=3, random_state=0)
+            reduced = normalize(svd.fit_transform(training))
+            kmeans = MiniBatchKMeans(n_clusters=nlist, random_state=0, n_init=1, batch_size=4096, max_iter=20)
+            kmeans.fit(reduced)
+            centroids = normalize(kmeans.cluster_centers_ @ svd.components_).astype(np.float32)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.centroids_T = _transposed(self.centroids)
+
+        # Cluster members stored contiguously: order[offsets[c]:offsets[c + 1]]
+        if labels is None:
+            labels = self._assign(vectors)
+        self.order = np.argsort(labels, kind='stable')
+        self.offsets = np.searchsorted(labels[self.order], np.arange(len(self.centroids) + 1))
+
+    def _assign(self, vectors) -> np.ndarray:
+        """Nearest centroid of every row"""
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], _ASSIGN_CHUNK_ROWS):
+            chunk = vectors[start:start + _ASSIGN_CHUNK_ROWS]
+            labels[start:start + _ASSIGN_CHUNK_ROWS] = _dense(chunk @ self.centroids_T).argmax(axis=1)
+        return labels
+
+    def search(self, query_vectors, top_k: int, mask: Optional[np.ndarray] = None) -> SearchResults:
+        """
+        With a mask, only matching members of the probed clusters are scored;
+        a very narrow filter can leave fewer than top_k candidates.
+        """
+        query_vectors = query_vectors.astype(np.float32)
+        centroid_scores = _dense(query_vectors @ self.centroids_T)
+        probes = top_k_indices(centroid_scores, self.nprobe)
+
+        results = []
+        for row, clusters in enumerate(probes):
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in clusters])
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if not len(candidates):
+                results.append((candidates, np.zeros(0, dtype=np.float32)))
+                continue
+
+            with span("similarity"):
+                # Rows times a dense query vector is one matvec, sparse or not
+                query = _dense(query_vectors[row]).ravel()
+                scores = np.asarray(self.vectors[candidates] @ query).ravel()
+            with span("top_k"):
+                top = top_k_indices(scores[np.newaxis, :], top_k)[0]
+            results.append((candidates[top], scores[top]))
+
+        return results
+
+    def patched(self, vectors, rows: np.ndarray, appended) -> "IVFIndex":
+        """Index over vectors, the matrix after a row patch; only new rows are assigned"""
+        old_labels = np.empty(len(self.order), dtype=np.int32)
+        old_labels[self.order] = np.repeat(np.arange(len(self.centroids), dtype=np.int32), np.diff(self.offsets))
+
+        from_old = rows < len(old_labels)
+        labels = np.empty(len(rows), dtype=np.int32)
+        labels[from_old] = old_labels[rows[from_old]]
+        if not from_old.all():
+            labels[~from_old] = self._assign(appended[rows[~from_old] - len(old_labels)])
+        return IVFIndex(vectors, centroids=self.centroids, nprobe=self.nprobe, labels=labels)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"centroids": self.centroids, "centroids_T": self.centroids_T, "order": self.order, "offsets": self.offsets}
+
+    def describe(self) -> Dict:
+        return {"backend": self.name, "nlist": len(self.centroids), "nprobe": self.nprobe}
+
+
+def build_index(vectors, backend: str = MODEL_INDEX_BACKEND, previous=None, state: Optional[Dict[str, np.ndarray]] = None):
+    """
+    Build the configured index over an assessment matrix
+
+    state restores a saved index of the type index_name() picks. Otherwise an IVF index
+    reuses the centroids of the previous one, so incremental updates only
+    reassign rows instead of re-clustering.
+    """
+    name = index_name(vectors.shape[0], backend)
+    if name == "exact":
+        return ExactIndex(vectors, state=state)
+
+    if name == "inverted":
+        return InvertedIndex(vectors, state=state)
+
+    if state is None and isinstance(previous, IVFIndex):
+        return IVFIndex(vectors, centroids=previous.centroids)
+    return IVFIndex(vectors, state=state)
+
+
+def index_name(rows: int, backend: str = MODEL_INDEX_BACKEND) -> str:
+    """Name of the index build_index() builds for a matrix with this many rows"""
+    if backend not in ("exact", "inverted", "ivf"):
+        raise ValueError(f"Unknown index backend: {backend}")
+    if backend == "ivf" and rows < IVF_MIN_ROWS:
+        return "exact"
+    return backend
+
+
+def patch_index(previous, vectors, rows: np.ndarray, appended, backend: str = MODEL_INDEX_BACKEND):
+    """
+    Index over vectors, the previous index's matrix after a row patch
+
+    rows and appended are as in _patch_postings. Only replaced, removed and
+    appended rows are touched; when the patched size calls for another index
+    type (the IVF_MIN_ROWS cut-over) the index is built from scratch.
+    """
+    if previous is None or previous.name != index_name(vectors.shape[0], backend):
+        return build_index(vectors, backend, previous=previous)
+    return previous.patched(vectors, rows, appended)
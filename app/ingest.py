@@ -0,0 +1,146 @@
+"""
+Bulk catalog ingestion
+Loads assessments and job roles from CSV, JSON or NDJSON files in batches
+with one multi-row upsert per batch (INSERT ... ON CONFLICT DO UPDATE on
+test_name / role_name). Re-running a load is safe: unchanged rows are left
+alone, changed rows are updated in place and keep their ids.
+"""
+import csv
+import itertools
+import json
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import Assessment, JobRole
+
+# Rows per upsert statement
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))
+
+ASSESSMENT_COLUMNS = ['test_name', 'test_description', 'category', 'skills_assessed', 'duration_minutes', 'difficulty_level']
+JOB_ROLE_COLUMNS = ['role_name', 'role_description', 'department', 'required_skills']
+INT_COLUMNS = {'duration_minutes'}
+
+_DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Yield row dicts from a .csv, .json (array) or .ndjson/.jsonl file"""
+    name = path.lower()
+    if name.endswith(".csv"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+    elif name.endswith((".ndjson", ".jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif name.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+
+def upsert_assessments(db: Session, records: Iterable[Dict], batch_size: int = INGEST_BATCH_SIZE) -> Dict:
+    """Insert or update assessments keyed by test_name"""
+    return _upsert(db, Assessment, 'test_name', ASSESSMENT_COLUMNS, records, batch_size)
+
+
+def upsert_job_roles(db: Session, records: Iterable[Dict], batch_size: int = INGEST_BATCH_SIZE) -> Dict:
+    """Insert or update job roles keyed by role_name"""
+    return _upsert(db, JobRole, 'role_name', JOB_ROLE_COLUMNS, records, batch_size)
+
+
+def _upsert(db: Session, model, key: str, columns: List[str], records: Iterable[Dict], batch_size: int) -> Dict:
+    """
+    Upsert records in batches and commit once at the end
+
+    Returns counts of rows read, written (inserted or changed), unchanged
+    and skipped (no key), plus the throughput.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise ValueError(f"Bulk ingestion supports PostgreSQL and SQLite, not {dialect}")
+
+    table = model.__table__
+    stmt = _DIALECT_INSERTS[dialect](table)
+    updates = {column: stmt.excluded[column] for column in columns if column != key}
+    if 'updated_at' in table.c:
+        updates['updated_at'] = func.now()
+    # Only touch rows whose values differ, so updated_at and the catalog hash stay put on a re-run
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_=updates,
+        where=or_(*[table.c[column].is_distinct_from(stmt.excluded[column]) for column in columns if column != key])
+    )
+
+    started = time.perf_counter()
+    report = {"rows": 0, "written": 0, "unchanged": 0, "skipped": 0}
+    rows = iter(records)
+    try:
+        while True:
+            raw = list(itertools.islice(rows, batch_size))
+            if not raw:
+                break
+            report["rows"] += len(raw)
+
+            # Postgres rejects a statement that updates the same row twice: last one wins
+            batch = {}
+            for record in raw:
+                row = _clean(record, columns)
+                if row[key]:
+                    batch[row[key]] = row
+                else:
+                    report["skipped"] += 1
+
+            if batch:
+                result = db.execute(stmt, list(batch.values()))
+                if result.rowcount >= 0:
+                    report["written"] += result.rowcount
+                    report["unchanged"] += len(batch) - result.rowcount
+                else:
+                    # Driver batched the statement without a row count
+                    report["written"] += len(batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed > 0 else report["rows"]
+    return report
+
+
+def _clean(record: Dict, columns: List[str]) -> Dict:
+    """Keep known columns; blank strings become NULL and integer columns are parsed"""
+    row = {}
+    for column in columns:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is not None and column in INT_COLUMNS:
+            value = int(value)
+        row[column] = value
+    return row
+
+
+def ingest_catalog(
+    db: Session,
+    assessments: Optional[Iterable[Dict]] = None,
+    job_roles: Optional[Iterable[Dict]] = None,
+    batch_size: int = INGEST_BATCH_SIZE
+) -> Dict:
+    """Upsert assessments and job roles; returns one report per table"""
+    report = {}
+    if assessments is not None:
+        report["assessments"] = upsert_assessments(db, assessments, batch_size)
+    if job_roles is not None:
+        report["job_roles"] = upsert_job_roles(db, job_roles, batch_size)
+    return report
@@ -1,20 +1,61 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import func, select, literal, union_all, null
+from sqlalchemy.exc import IntegrityError
 from typing import List
 from datetime import datetime
-import json
+import os
+import threading
+import time
+import anyio
 # Updated: Add seed endpoint
 from fastapi import FastAPI, Depends, HTTPException
 # Import from our app modules
-from app.database import engine, get_db, Base, SessionLocal
+from app.database import engine, get_db, Base, SessionLocal, check_database, get_pool_stats, pool_acquire_latency, DB_POOL_SIZE, DB_MAX_OVERFLOW
 from app import models, schemas
 from app.ml_model import recommendation_engine
+from app.filters import AssessmentFilter
+from app.assessment_store import ASSESSMENT_FIELDS
+from app.model_store import load_or_train, load_for_worker
+from app.retrain import retrain_manager
+from app.history_writer import history_writer
+from app.cache import LRUCache
+from app import analytics
+from app.analytics import rollup_worker
+from app.precompute import role_recommendations, PRECOMPUTE_TOP_N
+from app.bulk import detect_format, read_job_roles, stream_recommendations
+from app.ingest import ingest_catalog
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, list_page, parse_fields
+from app import metrics
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, span
+
+# "eager": create the schema on import and load the model before serving.
+# "lazy": schema comes from `python ml/bootstrap_db.py`, and the model loads
+# in the background while /health/live already answers.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager").lower()
+
+if STARTUP_MODE != "lazy":
+    models.create_schema(engine)
+
+# Model loading progress, for /health/ready
+startup_state = {"model": "pending", "error": None, "seconds": None}
+
+# Threads available to sync handlers; defaults to the most DB connections a worker can hold
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+# Columns the listing endpoints can return
+ASSESSMENT_LIST_FIELDS = ['id'] + [f for f in schemas.AssessmentResponse.model_fields if f != 'id']
+JOB_ROLE_LIST_FIELDS = ['id'] + [f for f in schemas.JobRoleResponse.model_fields if f != 'id']
+
+# /stats is cached this long; catalog edits through this worker clear it sooner
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "10"))
+stats_cache = LRUCache(max_size=1, ttl_seconds=STATS_CACHE_TTL_SECONDS)
 
-# Create all tables in database
-models.Base.metadata.create_all(bind=engine)
+# How often each worker picks up catalog edits made through other workers (0 disables)
+MODEL_SYNC_INTERVAL_SECONDS = float(os.getenv("MODEL_SYNC_INTERVAL_SECONDS", "30"))
 
 # Create FastAPI app - ONLY ONCE!
 app = FastAPI(
@@ -30,8 +71,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Per-route request latency and counts for /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    metrics.register(metrics.UnlabeledHistogram(
+        "shl_db_pool_acquire_seconds", "Time spent waiting for a pooled database connection", pool_acquire_latency
+    ))
+
 # THIS LINE WAS MISSING - Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -43,15 +92,64 @@ async def startup_event():
     print("🚀 Initializing SHL Recommendation Engine...")
     print("="*50)
     
+    # Size the threadpool that runs sync handlers
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    
+    if STARTUP_MODE == "lazy":
+        threading.Thread(target=_load_model, name="model-load", daemon=True).start()
+    else:
+        _load_model()
+    
+    # Start background writer for recommendation history, and its hourly rollups
+    history_writer.start()
+    rollup_worker.start()
+    
+    # Keep this worker's model in step with catalog edits
+    if MODEL_SYNC_INTERVAL_SECONDS > 0:
+        threading.Thread(target=_model_sync_loop, name="model-sync", daemon=True).start()
+
+def _load_model():
+    """Load or train the model, then precompute the stored job roles"""
+    startup_state["model"] = "loading"
+    started = time.perf_counter()
     db = SessionLocal()
     try:
-        recommendation_engine.train(db)
+        # Reuses the saved artifact unless the catalog changed
+        load_for_worker(recommendation_engine, db)
+        startup_state["model"] = "ready"
         print("✅ ML Model ready!\n")
+        
+        # Score the stored job roles in the background
+        role_recommendations.request_refresh()
     except Exception as e:
+        startup_state["model"] = "failed"
+        startup_state["error"] = str(e)
         print(f"❌ Error training model: {e}\n")
     finally:
+        startup_state["seconds"] = round(time.perf_counter() - started, 3)
         db.close()
 
+def _model_sync_loop():
+    """Periodically patch in assessments changed since the last sync"""
+    while True:
+        time.sleep(MODEL_SYNC_INTERVAL_SECONDS)
+        db = SessionLocal()
+        try:
+            result = recommendation_engine.sync(db)
+            if result["changed"] or result["removed"]:
+                print(f"🔄 Model synced: {result}")
+        except Exception as e:
+            print(f"❌ Error syncing model: {e}")
+        finally:
+            db.close()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued recommendation history before the worker exits"""
+    rollup_worker.stop()
+    history_writer.stop()
+    print("✅ Recommendation history flushed")
+
 @app.get("/")
 async def root():
     return {
@@ -65,92 +163,305 @@ async def root():
         }
     }
 
+# Handlers that use the synchronous Session or do CPU-bound scoring are plain
+# `def`, so FastAPI dispatches them to its threadpool instead of blocking the event loop
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "database": "connected"}
+def health_check():
+    """Health check that verifies a pooled database connection; does not wait for the model"""
+    database = check_database()
+    if database["status"] != "connected":
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "database": "error", "message": database["message"]}
+        )
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "latency_ms": database["latency_ms"],
+        "ready": recommendation_engine.snapshot is not None
+    }
 
-@app.get("/db-status")
-async def database_status(db: Session = Depends(get_db)):
-    try:
-        db.execute(text("SELECT 1"))   
-        return {
-            "status": "connected",
-            "database": "PostgreSQL",
-            "message": "Database connection successful"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": str(e)
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and serving requests; no database or model checks"""
+    return {"status": "alive", "startup_mode": STARTUP_MODE}
+
+@app.get("/health/ready")
+def readiness_check():
+    """Ready once the database answers and a model is loaded"""
+    database = check_database()
+    model_ready = recommendation_engine.snapshot is not None
+    ready = model_ready and database["status"] == "connected"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": database["status"],
+            "model": "ready" if model_ready else startup_state["model"],
+            "model_error": None if model_ready else startup_state["error"],
+            "model_load_seconds": startup_state["seconds"]
         }
+    )
 
-@app.get("/assessments", response_model=List[schemas.AssessmentResponse])
-async def get_all_assessments(db: Session = Depends(get_db)):
-    """Get all available assessments"""
-    assessments = db.query(models.Assessment).all()
-    return assessments
+@app.get("/db-status")
+def database_status():
+    database = check_database()
+    if database["status"] != "connected":
+        return database
+    return {
+        "status": "connected",
+        "database": engine.dialect.name,
+        "message": "Database connection successful",
+        "latency_ms": database["latency_ms"]
+    }
+
+@app.get("/db-pool-stats")
+async def get_db_pool_stats():
+    """Get live connection pool statistics for this worker"""
+    return get_pool_stats()
+
+def _page_responses(item_model) -> dict:
+    """OpenAPI description of a list_page() response"""
+    return {
+        200: {
+            "model": List[item_model],
+            "description": "One page of rows ordered by id, with only the requested fields",
+            "headers": {
+                "X-Next-Cursor": {"description": "Pass as after_id for the next page; absent on the last page", "schema": {"type": "string"}},
+                "ETag": {"description": "Send back in If-None-Match to get 304 while the page is unchanged", "schema": {"type": "string"}}
+            }
+        },
+        304: {"description": "Page unchanged since the ETag in If-None-Match"}
+    }
+
+@app.get("/assessments", response_model=None, response_class=JSONResponse, responses=_page_responses(schemas.AssessmentListItem))
+def get_all_assessments(
+    request: Request,
+    after_id: int = Query(None, description="Cursor: id of the last row of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: str = Query(None),
+    difficulty_level: str = Query(None),
+    fields: str = Query(None, description="Comma-separated columns to return, e.g. id,test_name"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a page of assessments; the next page starts after the X-Next-Cursor header
+
+    Returns at most `limit` rows (default DEFAULT_PAGE_SIZE, 50), not the whole
+    catalog: follow X-Next-Cursor until it is absent to read every row.
+    """
+    return list_page(
+        request, db, models.Assessment,
+        fields=parse_fields(fields, ASSESSMENT_LIST_FIELDS),
+        filters={"category": category, "difficulty_level": difficulty_level},
+        after_id=after_id,
+        limit=limit,
+        changed_at=func.coalesce(models.Assessment.updated_at, models.Assessment.created_at)
+    )
 
 @app.get("/assessments/{assessment_id}", response_model=schemas.AssessmentResponse)
-async def get_assessment(assessment_id: int, db: Session = Depends(get_db)):
+def get_assessment(assessment_id: int, db: Session = Depends(get_db)):
     """Get specific assessment by ID"""
     assessment = db.query(models.Assessment).filter(models.Assessment.id == assessment_id).first()
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     return assessment
 
-@app.get("/job-roles", response_model=List[schemas.JobRoleResponse])
-async def get_all_job_roles(db: Session = Depends(get_db)):
-    """Get all job roles"""
-    roles = db.query(models.JobRole).all()
-    return roles
+@app.post("/assessments", response_model=schemas.AssessmentResponse, status_code=201)
+def create_assessment(assessment: schemas.AssessmentCreate, db: Session = Depends(get_db)):
+    """Add an assessment and patch it into the model without a full retrain"""
+    record = models.Assessment(**assessment.model_dump())
+    db.add(record)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="An assessment with this test_name already exists")
+    db.refresh(record)
+    
+    _apply_catalog_change(db, changed=[record])
+    return record
+
+@app.put("/assessments/{assessment_id}", response_model=schemas.AssessmentResponse)
+def update_assessment(assessment_id: int, assessment: schemas.AssessmentCreate, db: Session = Depends(get_db)):
+    """Replace an assessment and patch it into the model without a full retrain"""
+    record = db.query(models.Assessment).filter(models.Assessment.id == assessment_id).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    
+    for field, value in assessment.model_dump().items():
+        setattr(record, field, value)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="An assessment with this test_name already exists")
+    db.refresh(record)
+    
+    _apply_catalog_change(db, changed=[record])
+    return record
+
+@app.delete("/assessments/{assessment_id}")
+def delete_assessment(assessment_id: int, db: Session = Depends(get_db)):
+    """Delete an assessment and drop it from the model"""
+    record = db.query(models.Assessment).filter(models.Assessment.id == assessment_id).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    
+    db.delete(record)
+    db.commit()
+    
+    _apply_catalog_change(db, removed=[assessment_id])
+    return {"status": "deleted", "id": assessment_id}
+
+def _apply_catalog_change(db: Session, changed=None, removed=None):
+    """Patch the model after a catalog edit; the write itself has already committed"""
+    stats_cache.clear()
+    try:
+        if recommendation_engine.assessment_vectors is None:
+            recommendation_engine.train(db)
+        elif changed:
+            recommendation_engine.upsert_assessments([
+                {field: getattr(record, field) for field in ASSESSMENT_FIELDS}
+                for record in changed
+            ])
+        elif removed:
+            recommendation_engine.remove_assessments(removed)
+    except Exception as e:
+        print(f"❌ Error updating model: {e}")
+
+@app.get("/job-roles", response_model=None, response_class=JSONResponse, responses=_page_responses(schemas.JobRoleListItem))
+def get_all_job_roles(
+    request: Request,
+    after_id: int = Query(None, description="Cursor: id of the last row of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = Query(None, description="Comma-separated columns to return, e.g. id,role_name"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a page of job roles; the next page starts after the X-Next-Cursor header
+
+    Returns at most `limit` rows (default DEFAULT_PAGE_SIZE, 50), not every
+    job role: follow X-Next-Cursor until it is absent to read them all.
+    """
+    # job_roles has no updated_at column, so the ETag is taken from the page body
+    return list_page(
+        request, db, models.JobRole,
+        fields=parse_fields(fields, JOB_ROLE_LIST_FIELDS),
+        filters={},
+        after_id=after_id,
+        limit=limit
+    )
+
+@app.get("/job-roles/{role_id}/recommendations", response_model=schemas.JobRoleRecommendationsResponse)
+def get_job_role_recommendations(role_id: int, top_k: int = Query(5, ge=1, le=PRECOMPUTE_TOP_N), db: Session = Depends(get_db)):
+    """Get the precomputed recommendations stored for a job role"""
+    role = db.query(models.JobRole).filter(models.JobRole.id == role_id).first()
+    if role is None:
+        raise HTTPException(status_code=404, detail="Job role not found")
+    
+    query = (
+        db.query(models.JobRoleRecommendation, models.Assessment)
+        .join(models.Assessment, models.Assessment.id == models.JobRoleRecommendation.assessment_id)
+        .filter(models.JobRoleRecommendation.job_role_id == role_id)
+    )
+    # Prefer the lists of this worker's model, else whatever is stored
+    rows = []
+    key = role_recommendations.current_key()
+    if key is not None:
+        current = query.filter(models.JobRoleRecommendation.model_version == key)
+        rows = current.order_by(models.JobRoleRecommendation.rank).limit(top_k).all()
+    if not rows:
+        # Another worker's model; the newest one when a refresh left several
+        latest = (
+            db.query(models.JobRoleRecommendation.model_version)
+            .filter(models.JobRoleRecommendation.job_role_id == role_id)
+            .order_by(models.JobRoleRecommendation.created_at.desc(), models.JobRoleRecommendation.id.desc())
+            .limit(1)
+            .scalar()
+        )
+        if latest is not None:
+            current = query.filter(models.JobRoleRecommendation.model_version == latest)
+            rows = current.order_by(models.JobRoleRecommendation.rank).limit(top_k).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No precomputed recommendations for this job role yet")
+    
+    recommended_tests = [
+        schemas.RecommendedTest(
+            test_name=assessment.test_name,
+            test_description=assessment.test_description,
+            category=assessment.category,
+            confidence_score=stored.confidence_score,
+            skills_match=assessment.skills_assessed
+        )
+        for stored, assessment in rows
+    ]
+    return schemas.JobRoleRecommendationsResponse(
+        job_role_id=role.id,
+        role_name=role.role_name,
+        model_version=rows[0][0].model_version,
+        recommendations=recommended_tests,
+        total_recommendations=len(recommended_tests),
+        computed_at=rows[0][0].created_at
+    )
 
 @app.get("/stats")
-async def get_stats(db: Session = Depends(get_db)):
+def get_stats(db: Session = Depends(get_db)):
     """Get database statistics"""
-    total_assessments = db.query(models.Assessment).count()
-    total_roles = db.query(models.JobRole).count()
-    total_recommendations = db.query(models.Recommendation).count()
+    stats = stats_cache.get("stats")
+    if stats is None:
+        stats = _collect_stats(db)
+        stats_cache.set("stats", stats)
+    return stats
+
+def _collect_stats(db: Session):
+    """All counts in one round trip: assessments per category, plus the other table totals"""
+    counts = union_all(
+        select(literal("assessments").label("source"), models.Assessment.category.label("category"), func.count().label("total"))
+        .group_by(models.Assessment.category),
+        select(literal("job_roles"), null(), func.count()).select_from(models.JobRole),
+        select(literal("recommendations"), null(), func.count()).select_from(models.Recommendation)
+    )
+    
+    totals = {"assessments": 0, "job_roles": 0, "recommendations": 0}
+    categories = {}
+    for source, category, total in db.execute(counts):
+        totals[source] += total
+        if source == "assessments":
+            name = (category or "uncategorized").lower()
+            categories[name] = categories.get(name, 0) + total
     
     return {
-        "total_assessments": total_assessments,
-        "total_job_roles": total_roles,
-        "total_recommendations": total_recommendations,
-        "categories": {
-            "technical": db.query(models.Assessment).filter(models.Assessment.category == "Technical").count(),
-            "cognitive": db.query(models.Assessment).filter(models.Assessment.category == "Cognitive").count(),
-            "behavioral": db.query(models.Assessment).filter(models.Assessment.category == "Behavioral").count()
-        }
+        "total_assessments": totals["assessments"],
+        "total_job_roles": totals["job_roles"],
+        "total_recommendations": totals["recommendations"],
+        "categories": categories
     }
 
 @app.post("/recommend", response_model=schemas.RecommendationResponse)
-async def get_recommendations(
-    request: schemas.RecommendationRequest,
-    db: Session = Depends(get_db)
-):
+def get_recommendations(request: schemas.RecommendationRequest):
     """Get AI-powered assessment recommendations for a job role"""
+    _require_model()
+    filters = _to_filter(request)
     try:
-        recommendations = recommendation_engine.recommend(
-            job_role=request.job_role,
-            top_k=request.top_k
-        )
+        # Known job roles are served from the precomputed lists (unfiltered only)
+        recommendations = None
+        if not filters.active:
+            with span("precomputed_lookup"):
+                recommendations = role_recommendations.lookup(request.job_role, request.top_k)
+        if recommendations is None:
+            recommendations = recommendation_engine.recommend(
+                job_role=request.job_role,
+                top_k=request.top_k,
+                filters=filters
+            )
         
-        recommended_tests = []
-        for rec in recommendations:
-            recommended_tests.append(schemas.RecommendedTest(
-                test_name=rec['test_name'],
-                test_description=rec['test_description'],
-                category=rec['category'],
-                confidence_score=rec['confidence_score'],
-                skills_match=rec['skills_assessed']
-            ))
+        with span("serialize"):
+            recommended_tests = _to_recommended_tests(recommendations)
         
-        recommendation_record = models.Recommendation(
-            job_role=request.job_role,
-            recommended_tests=json.dumps([r.test_name for r in recommended_tests]),
-            confidence_score=recommended_tests[0].confidence_score if recommended_tests else 0.0
-        )
-        db.add(recommendation_record)
-        db.commit()
+        # History is written in the background, off the request path
+        with span("history_submit"):
+            _log_recommendation(request.job_role, recommended_tests)
         
         return schemas.RecommendationResponse(
             job_role=request.job_role,
@@ -162,35 +473,192 @@ async def get_recommendations(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
 
+@app.post("/recommend/batch", response_model=schemas.BatchRecommendationResponse)
+def get_batch_recommendations(request: schemas.BatchRecommendationRequest):
+    """Get recommendations for many job roles in one vectorized scoring pass"""
+    _require_model()
+    filters = _to_filter(request)
+    try:
+        # Known job roles are served from the precomputed lists, the rest scored together
+        if filters.active:
+            batch = [None] * len(request.job_roles)
+        else:
+            batch = [role_recommendations.lookup(job_role, request.top_k) for job_role in request.job_roles]
+        misses = [i for i, recommendations in enumerate(batch) if recommendations is None]
+        if misses:
+            scored = recommendation_engine.recommend_batch(
+                job_roles=[request.job_roles[i] for i in misses],
+                top_k=request.top_k,
+                filters=filters
+            )
+            for i, recommendations in zip(misses, scored):
+                batch[i] = recommendations
+        
+        timestamp = datetime.now()
+        results = []
+        for job_role, recommendations in zip(request.job_roles, batch):
+            recommended_tests = _to_recommended_tests(recommendations)
+            results.append(schemas.RecommendationResponse(
+                job_role=job_role,
+                recommendations=recommended_tests,
+                total_recommendations=len(recommended_tests),
+                timestamp=timestamp
+            ))
+            _log_recommendation(job_role, recommended_tests)
+        
+        return schemas.BatchRecommendationResponse(
+            results=results,
+            total_job_roles=len(results),
+            timestamp=timestamp
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
+
+@app.post("/recommend/stream")
+def stream_bulk_recommendations(
+    file: UploadFile = File(...),
+    top_k: int = Query(5, ge=1, le=schemas.MAX_TOP_K),
+    format: str = Query(None, pattern="^(csv|ndjson)$")
+):
+    """Stream NDJSON recommendations for an uploaded CSV or NDJSON file of job roles"""
+    _require_model()
+    
+    # The upload is spooled to disk by Starlette; rows are read and decoded lazily
+    # while streaming, so bad lines become error lines instead of a broken response
+    fmt = format or detect_format(file.filename, file.content_type)
+    
+    return StreamingResponse(
+        stream_recommendations(recommendation_engine, read_job_roles(file.file, fmt), top_k=top_k),
+        media_type="application/x-ndjson"
+    )
+
+def _require_model():
+    """503 while the model is still loading (or the catalog is empty)"""
+    if recommendation_engine.snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Model is still loading" if startup_state["model"] in ("pending", "loading") else "Model not trained yet",
+            headers={"Retry-After": "5"}
+        )
+
+def _to_filter(request: schemas.RecommendationFilters) -> AssessmentFilter:
+    """Engine filter from the filter fields of a request"""
+    if (request.min_duration_minutes is not None and request.max_duration_minutes is not None
+            and request.min_duration_minutes > request.max_duration_minutes):
+        raise HTTPException(status_code=422, detail="min_duration_minutes must not exceed max_duration_minutes")
+    return AssessmentFilter(
+        category=request.category,
+        difficulty_level=request.difficulty_level,
+        min_duration_minutes=request.min_duration_minutes,
+        max_duration_minutes=request.max_duration_minutes
+    )
+
+def _log_recommendation(job_role, recommended_tests):
+    """Queue a recommendation history record for the background writer"""
+    history_writer.submit(
+        job_role=job_role,
+        recommended_tests=[r.test_name for r in recommended_tests],
+        confidence_score=recommended_tests[0].confidence_score if recommended_tests else 0.0,
+        scores=[r.confidence_score for r in recommended_tests]
+    )
+
+def _to_recommended_tests(recommendations):
+    """Convert engine output into response schema objects"""
+    return [
+        schemas.RecommendedTest(
+            test_name=rec['test_name'],
+            test_description=rec['test_description'],
+            category=rec['category'],
+            confidence_score=rec['confidence_score'],
+            skills_match=rec['skills_assessed']
+        )
+        for rec in recommendations
+    ]
+
 @app.get("/model-info")
 async def get_model_info():
     """Get information about the ML model"""
     return recommendation_engine.get_model_info()
 
+@app.post("/model/retrain", status_code=202)
+async def retrain_model():
+    """Start a background retrain; the current model keeps serving until the new one is swapped in"""
+    job, started = retrain_manager.start()
+    return {"started": started, **job}
+
+@app.get("/model/retrain")
+async def get_retrain_status():
+    """Get progress of the current or last background retrain"""
+    job = retrain_manager.status()
+    if job is None:
+        raise HTTPException(status_code=404, detail="No retrain has been started")
+    return job
+
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Get hit/miss/eviction counters of the recommendation cache"""
+    return {
+        "model_version": recommendation_engine.model_version,
+        **recommendation_engine.cache.stats(),
+        "precomputed_job_roles": role_recommendations.stats(),
+        "stats_cache": stats_cache.stats()
+    }
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Request and recommendation stage metrics in Prometheus text format"""
+        return Response(content=metrics.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/history-writer-stats")
+async def get_history_writer_stats():
+    """Get queue depth and write/drop counters of the history writer"""
+    return history_writer.stats()
+
+# Analytics endpoints read only the hourly rollups, never the raw history
+@app.get("/analytics/job-roles")
+def get_top_job_roles(hours: int = Query(24, ge=1, le=2160), limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    """Most requested job roles over the last N hours"""
+    return {"hours": hours, "job_roles": analytics.top_keys(db, analytics.ROLE, hours, limit)}
+
+@app.get("/analytics/tests")
+def get_top_tests(hours: int = Query(24, ge=1, le=2160), limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    """Most recommended tests over the last N hours"""
+    return {"hours": hours, "tests": analytics.top_keys(db, analytics.TEST, hours, limit)}
+
+@app.get("/analytics/scores")
+def get_score_distribution(hours: int = Query(24, ge=1, le=2160), db: Session = Depends(get_db)):
+    """Distribution of top confidence scores over the last N hours"""
+    return {"hours": hours, "buckets": analytics.score_distribution(db, hours)}
+
+@app.get("/analytics/hourly")
+def get_hourly_requests(hours: int = Query(24, ge=1, le=2160), db: Session = Depends(get_db)):
+    """Recommendation requests per hour over the last N hours"""
+    return {"hours": hours, "requests": analytics.hourly_requests(db, hours)}
+
+@app.get("/analytics/rollup-status")
+async def get_rollup_status():
+    """Get when the rollups were last refreshed"""
+    return rollup_worker.stats()
+
 
 @app.get("/seed-database")
-async def seed_database(db: Session = Depends(get_db)):
-    """Seed database with sample data"""
+def seed_database(db: Session = Depends(get_db)):
+    """Seed database with sample data; safe to call again"""
     try:
         from ml.data.sample_assessments import SAMPLE_ASSESSMENTS, SAMPLE_JOB_ROLES
         
-        existing = db.query(models.Assessment).count()
-        if existing > 0:
-            return {"status": "already_seeded", "count": existing}
-        
-        for assessment_data in SAMPLE_ASSESSMENTS:
-            db.add(models.Assessment(**assessment_data))
-        
-        for role_data in SAMPLE_JOB_ROLES:
-            db.add(models.JobRole(**role_data))
-        
-        db.commit()
-        recommendation_engine.train(db)
+        # Bulk upsert, then one model rebuild if the catalog changed
+        report = ingest_catalog(db, assessments=SAMPLE_ASSESSMENTS, job_roles=SAMPLE_JOB_ROLES)
+        stats_cache.clear()
+        load_or_train(recommendation_engine, db)
         
         return {
             "status": "success",
             "assessments": len(SAMPLE_ASSESSMENTS),
-            "job_roles": len(SAMPLE_JOB_ROLES)
+            "job_roles": len(SAMPLE_JOB_ROLES),
+            "ingest": report
         }
     except Exception as e:
         db.rollback()
@@ -0,0 +1,232 @@
+"""
+Lightweight in-process metrics
+Histograms of request latency per endpoint and of each stage of a
+recommendation, request counters, and their Prometheus text exposition for
+/metrics. With METRICS_ENABLED=false spans are a shared no-op, the request
+middleware is not installed and /metrics is not served. Every worker process
+keeps its own metrics.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Latency buckets in seconds
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Finer buckets for the sub-millisecond stages of a recommendation
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025) + DEFAULT_LATENCY_BUCKETS
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram with a running sum and count"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        """Return cumulative bucket counts keyed by upper bound"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self.sum, self.count
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else 0.0,
+            "buckets": cumulative
+        }
+
+    def exposition(self, name: str, labels: str = "") -> List[str]:
+        """Prometheus sample lines for this histogram"""
+        snapshot = self.snapshot()
+        prefix = labels + "," if labels else ""
+        lines = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in snapshot["buckets"].items()]
+        suffix = "{" + labels + "}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {snapshot['sum']}")
+        lines.append(f"{name}_count{suffix} {snapshot['count']}")
+        return lines
+
+
+class LabeledHistogram:
+    """One Histogram per combination of label values"""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self._children: Dict[Tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: float, *values):
+        self.labels(*values).observe(value)
+
+    def exposition(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.exposition(self.name, _format_labels(self.label_names, values)))
+        return lines
+
+
+class LabeledCounter:
+    """Monotonic counter per combination of label values"""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str]):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: int = 1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def exposition(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{{{_format_labels(self.label_names, label_values)}}} {value}")
+        return lines
+
+
+class UnlabeledHistogram:
+    """Exposes an existing Histogram (e.g. the pool acquire latency) under a metric name"""
+
+    def __init__(self, name: str, description: str, histogram: Histogram):
+        self.name = name
+        self.description = description
+        self.histogram = histogram
+
+    def exposition(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"] + self.histogram.exposition(self.name)
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+# Hot-path metrics
+request_latency = LabeledHistogram("shl_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+request_count = LabeledCounter("shl_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+stage_latency = LabeledHistogram("shl_stage_duration_seconds", "Time spent in each recommendation stage", ("stage",), STAGE_BUCKETS)
+
+registry = [request_latency, request_count, stage_latency]
+
+
+def register(metric):
+    """Add a metric to the /metrics output"""
+    registry.append(metric)
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format"""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.exposition())
+    return "\n".join(lines) + "\n"
+
+
+class _Span:
+    """Times a with-block into the stage histogram"""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+_NO_SPAN = nullcontext()
+
+
+def span(stage: str):
+    """Time one stage of the hot path: `with span("transform"): ...`"""
+    if not METRICS_ENABLED:
+        return _NO_SPAN
+    return _Span(stage_latency.labels(stage))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route
+
+    Requests are labelled with the route template (/assessments/{assessment_id}),
+    not the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self._route(scope)
+            request_latency.observe(time.perf_counter() - started, scope["method"], route)
+            request_count.inc(scope["method"], route, str(status))
+
+    def _route(self, scope) -> str:
+        """Route template of the endpoint the router matched"""
+        if self._routes is None:
+            self._routes = {
+                getattr(route, "endpoint", None): route.path
+                for route in getattr(scope.get("app"), "routes", [])
+                if hasattr(route, "endpoint")
+            }
+        return self._routes.get(scope.get("endpoint"), "unmatched")
@@ -1,23 +1,122 @@
 """
 AI/ML Recommendation Engine
-Uses TF-IDF and Cosine Similarity to match job roles with assessments
+Uses per-field TF-IDF and a weighted sum of cosine similarities to match job
+roles with assessments (see app.vectorizer)
 """
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import dataclasses
+import itertools
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
 import numpy as np
-from typing import List, Dict
+from scipy import sparse
+from typing import Iterable, List, Dict, Optional, Sequence
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models import Assessment
+from app.cache import LRUCache
+from app.filters import NO_FILTER, AssessmentFilter, FilterMasks
+from app.assessment_store import ASSESSMENT_FIELDS, EMPTY_ASSESSMENTS, ColumnarAssessments
+from app.index import build_index, patch_index
+from app.metrics import span
+from app.vectorizer import FieldVectorizer
+
+# Number of job roles scored per matrix product in recommend_batch()
+BATCH_CHUNK_SIZE = 256
+
+# Score of the general assessments returned when nothing matches; below the
+# Medium band, so they never read as (or rank above) real matches
+DEFAULT_RECOMMENDATION_SCORE = 0.1
+
+# Assessment matrices up to this many cells (20 MB as float32) are stored dense
+DENSE_MAX_CELLS = 5_000_000
+
+# Result cache settings for recommend()
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "1024"))
+RECOMMEND_CACHE_TTL_SECONDS = float(os.getenv("RECOMMEND_CACHE_TTL_SECONDS", "300"))
+
+# Refit from scratch once incremental updates raise the catalog's
+# out-of-vocabulary token rate this far above the rate at the last full fit
+MODEL_DRIFT_THRESHOLD = float(os.getenv("MODEL_DRIFT_THRESHOLD", "0.1"))
+
+
+def normalize_job_role(job_role: str) -> str:
+    """Lowercase and collapse whitespace so equivalent titles share a cache key"""
+    return " ".join(job_role.lower().split())
+
+
+@dataclasses.dataclass(frozen=True)
+class ModelSnapshot:
+    """
+    One trained model: everything recommend() reads
+    
+    Snapshots are never modified. Training and incremental updates build a
+    new one and swap it in with a single reference assignment, so a request
+    always sees a vectorizer, matrix and metadata that belong together.
+    """
+    vectorizer: FieldVectorizer
+    assessment_vectors: object  # Dense ndarray or CSR matrix
+    assessments_data: ColumnarAssessments  # Row metadata; dicts are built per hit
+    catalog_hash: Optional[str] = None
+    index: object = None  # Search index over assessment_vectors, see app.index
+    filters: Optional[FilterMasks] = None  # Category/difficulty/duration masks over the rows
+    version: int = 0
+    version_id: str = ""
+    trained_at: Optional[datetime] = None
+
 
 class RecommendationEngine:
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=100,
-            stop_words='english',
-            ngram_range=(1, 2)  # Use unigrams and bigrams
-        )
-        self.assessment_vectors = None
-        self.assessments_data = []
+        # Current model; replaced as a whole, never mutated
+        self._snapshot = None
+        # Versions are assigned when a snapshot is installed, so cached
+        # results never outlive their model
+        self._versions = itertools.count(1)
+        self.cache = LRUCache(max_size=RECOMMEND_CACHE_SIZE, ttl_seconds=RECOMMEND_CACHE_TTL_SECONDS)
+        
+        # Incremental update state
+        self._update_lock = threading.RLock()
+        self.synced_at = None  # Newest created_at/updated_at already in the model
+        self.incremental_updates = 0
+        self._drift_tokens = 0
+        self._drift_oov_tokens = 0
+    
+    @property
+    def snapshot(self) -> Optional[ModelSnapshot]:
+        return self._snapshot
+    
+    @property
+    def vectorizer(self) -> Optional[FieldVectorizer]:
+        snapshot = self._snapshot
+        return snapshot.vectorizer if snapshot else None
+    
+    @property
+    def assessment_vectors(self):
+        snapshot = self._snapshot
+        return snapshot.assessment_vectors if snapshot else None
+    
+    @property
+    def assessments_data(self) -> ColumnarAssessments:
+        snapshot = self._snapshot
+        return snapshot.assessments_data if snapshot else EMPTY_ASSESSMENTS
+    
+    @property
+    def model_version(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else 0
+    
+    @property
+    def catalog_hash(self) -> Optional[str]:
+        snapshot = self._snapshot
+        return snapshot.catalog_hash if snapshot else None
+    
+    @catalog_hash.setter
+    def catalog_hash(self, value: Optional[str]):
+        # Only labels the current model, so results and cache stay valid
+        with self._update_lock:
+            if self._snapshot is not None:
+                self._snapshot = dataclasses.replace(self._snapshot, catalog_hash=value)
     
     def train(self, db: Session):
         """
@@ -26,88 +125,361 @@ class RecommendationEngine:
         """
         print("🤖 Training recommendation model...")
         
-        # Fetch all assessments from database
-        assessments = db.query(Assessment).all()
+        assessments, synced_at = self.fetch_assessments(db)
+        snapshot = self.build_snapshot(assessments)
+        
+        self.install(snapshot, synced_at=synced_at)
+        
+        print(f"✅ Model trained with {len(self.assessments_data)} assessments!")
+        return self
+    
+    def fetch_assessments(self, db: Session) -> tuple:
+        """Load every assessment as a dict, plus the newest change time"""
+        synced_at = db.query(func.max(_changed_at())).scalar()
+        assessments = db.query(Assessment).order_by(Assessment.id).all()
         
         if not assessments:
             raise ValueError("No assessments found in database. Please seed data first.")
         
-        # Prepare training data
-        self.assessments_data = []
-        texts = []
+        records = [
+            {field: getattr(assessment, field) for field in ASSESSMENT_FIELDS}
+            for assessment in assessments
+        ]
+        return records, synced_at
+    
+    def fit(self, assessments: List[Dict]):
+        """Fit the vectorizer and assessment matrix from assessment dicts"""
+        self.install(self.build_snapshot(assessments))
+        return self
+    
+    def build_snapshot(self, assessments: List[Dict], catalog_hash: Optional[str] = None) -> ModelSnapshot:
+        """
+        Fit a new model without touching the one being served
+        
+        Safe to call from a background thread; install() makes it live.
+        """
+        # One L2-normalized TF-IDF block per field, stacked side by side
+        vectorizer, vectors = FieldVectorizer.fit(assessments)
+        
+        # Small catalogs score faster dense, large ones stay sparse
+        if vectors.shape[0] * vectors.shape[1] <= DENSE_MAX_CELLS:
+            vectors = vectors.toarray()
+        else:
+            vectors = vectors.tocsr()
         
-        for assessment in assessments:
-            # Combine all relevant text fields for better matching
-            combined_text = f"{assessment.test_name} {assessment.test_description} {assessment.skills_assessed} {assessment.category}"
-            texts.append(combined_text)
+        return ModelSnapshot(
+            vectorizer=vectorizer,
+            assessment_vectors=vectors,
+            assessments_data=ColumnarAssessments.from_records(assessments),
+            catalog_hash=catalog_hash,
+            index=build_index(vectors)
+        )
+    
+    def load_state(self, vectorizer: FieldVectorizer, assessment_vectors, assessments_data: Sequence[Dict], catalog_hash: Optional[str] = None, index=None):
+        """Install a fitted vectorizer, matrix and metadata from a saved artifact"""
+        if not isinstance(assessments_data, ColumnarAssessments):
+            assessments_data = ColumnarAssessments.from_records(assessments_data)
+        self.install(ModelSnapshot(
+            vectorizer=vectorizer,
+            assessment_vectors=assessment_vectors,
+            assessments_data=assessments_data,
+            catalog_hash=catalog_hash,
+            index=index if index is not None else build_index(assessment_vectors)
+        ))
+    
+    def install(self, snapshot: ModelSnapshot, synced_at: Optional[datetime] = None, expected_version: Optional[int] = None) -> bool:
+        """
+        Atomically make a freshly fitted snapshot the live model
+        
+        With expected_version, nothing is installed (and False is returned)
+        unless the live model is still that version, i.e. no update landed
+        while the snapshot was being fitted.
+        """
+        with self._update_lock:
+            if expected_version is not None and self.model_version != expected_version:
+                return False
+            self._swap(snapshot)
+            if synced_at is not None:
+                self.synced_at = synced_at
             
-            self.assessments_data.append({
-                'id': assessment.id,
-                'test_name': assessment.test_name,
-                'test_description': assessment.test_description,
-                'category': assessment.category,
-                'skills_assessed': assessment.skills_assessed,
-                'difficulty_level': assessment.difficulty_level,
-                'duration_minutes': assessment.duration_minutes
-            })
-        
-        # Create TF-IDF vectors
-        self.assessment_vectors = self.vectorizer.fit_transform(texts)
+            # A fresh vectorizer starts with no drift
+            self._drift_tokens = 0
+            self._drift_oov_tokens = 0
+            return True
+    
+    def _swap(self, snapshot: ModelSnapshot):
+        """Stamp a version on the snapshot and publish it with one assignment"""
+        if snapshot.index is None:
+            # Patched matrices keep the previous index's clusters
+            previous = self._snapshot.index if self._snapshot else None
+            snapshot = dataclasses.replace(snapshot, index=build_index(snapshot.assessment_vectors, previous=previous))
+        if snapshot.filters is None:
+            snapshot = dataclasses.replace(snapshot, filters=FilterMasks(snapshot.assessments_data))
         
-        print(f"✅ Model trained with {len(self.assessments_data)} assessments!")
-        return self
+        self._snapshot = dataclasses.replace(
+            snapshot,
+            version=next(self._versions),
+            version_id=uuid.uuid4().hex[:12],
+            trained_at=datetime.now(timezone.utc)
+        )
+        
+        # Invalidate cached results from the previous model
+        self.cache.clear()
     
-    def recommend(self, job_role: str, top_k: int = 5) -> List[Dict]:
+    def sync(self, db: Session) -> Dict:
+        """
+        Apply assessments added, edited or deleted since the last train() or sync()
+        
+        Changed rows are found through created_at/updated_at and patched in with
+        the existing vocabulary; deletions are detected by comparing row counts.
+        """
+        with self._update_lock:
+            if self.assessment_vectors is None:
+                self.train(db)
+                return {"mode": "full", "changed": len(self.assessments_data), "removed": 0}
+            
+            synced_at = db.query(func.max(_changed_at())).scalar()
+            query = db.query(Assessment)
+            if self.synced_at is not None:
+                # Re-check the last second: some databases store whole-second timestamps,
+                # and rows that did not change are skipped anyway
+                query = query.filter(_changed_at() >= self.synced_at - timedelta(seconds=1))
+            changed = [
+                {field: getattr(assessment, field) for field in ASSESSMENT_FIELDS}
+                for assessment in query.all()
+            ]
+            
+            result = self.upsert_assessments(changed)
+            
+            # Rows were deleted if the table is smaller than the model
+            total = db.query(func.count(Assessment.id)).scalar()
+            if total != len(self.assessments_data):
+                existing_ids = {row[0] for row in db.query(Assessment.id)}
+                missing = [i for i in self._assessment_ids() if i not in existing_ids]
+                result["removed"] = self.remove_assessments(missing)["removed"]
+            
+            self.synced_at = synced_at
+            return result
+    
+    def upsert_assessments(self, assessments: List[Dict]) -> Dict:
+        """
+        Add or replace assessments without refitting the vectorizer
+        
+        Falls back to a full refit when vocabulary drift passes MODEL_DRIFT_THRESHOLD.
+        """
+        with self._update_lock:
+            snapshot = self._snapshot
+            data = snapshot.assessments_data
+            positions = dict(zip(data.ids.tolist(), range(len(data))))
+            
+            # Skip rows that did not actually change
+            updates = [
+                dict(a) for a in assessments
+                if a['id'] not in positions or data[positions[a['id']]] != dict(a)
+            ]
+            if not updates:
+                return {"mode": "none", "changed": 0, "removed": 0}
+            
+            self._track_drift(updates)
+            
+            if self.vocabulary_drift() > MODEL_DRIFT_THRESHOLD:
+                records = data.to_records()
+                for update in updates:
+                    if update['id'] in positions:
+                        records[positions[update['id']]] = update
+                    else:
+                        records.append(update)
+                print(f"🔁 Vocabulary drift {self.vocabulary_drift():.2f} over threshold, refitting model...")
+                self.fit(records)
+                return {"mode": "full", "changed": len(updates), "removed": 0}
+            
+            # Source of each row of the patched model: unchanged rows, replaced
+            # rows pointing at their update, then appended rows
+            old_count = len(data)
+            rows = np.arange(old_count)
+            appended = []
+            for j, update in enumerate(updates):
+                if update['id'] in positions:
+                    rows[positions[update['id']]] = old_count + j
+                else:
+                    appended.append(old_count + j)
+            rows = np.concatenate([rows, np.array(appended, dtype=np.int64)])
+            
+            self._patch(
+                snapshot, rows,
+                self.vectorizer.transform_assessments(updates),
+                ColumnarAssessments.from_records(updates)
+            )
+            self.incremental_updates += 1
+            return {"mode": "incremental", "changed": len(updates), "removed": 0}
+    
+    def remove_assessments(self, assessment_ids: Iterable[int]) -> Dict:
+        """Drop assessments from the model"""
+        with self._update_lock:
+            snapshot = self._snapshot
+            ids = np.asarray(snapshot.assessments_data.ids)
+            rows = np.flatnonzero(~np.isin(ids, np.fromiter(set(assessment_ids), dtype=np.int64)))
+            removed = len(ids) - len(rows)
+            if not removed:
+                return {"mode": "none", "changed": 0, "removed": 0}
+            
+            self._patch(snapshot, rows)
+            self.incremental_updates += 1
+            return {"mode": "incremental", "changed": 0, "removed": removed}
+    
+    def _patch(self, snapshot: ModelSnapshot, rows: np.ndarray, new_vectors=None, new_data: Optional[ColumnarAssessments] = None):
+        """
+        Swap in the snapshot's rows patched as given by rows
+        
+        rows picks, for every row of the new model, an existing row (below the
+        current row count) or a row of new_vectors/new_data after them. The
+        matrix, metadata columns, filter masks and index are patched, not rebuilt.
+        """
+        vectors = snapshot.assessment_vectors
+        if new_vectors is not None:
+            vectors = self._stack(vectors, new_vectors)
+        vectors = vectors[rows]
+        
+        assessments_data = snapshot.assessments_data.take(rows, new_data)
+        self._swap(ModelSnapshot(
+            vectorizer=snapshot.vectorizer,
+            assessment_vectors=vectors,
+            assessments_data=assessments_data,
+            index=patch_index(snapshot.index, vectors, rows, new_vectors),
+            filters=snapshot.filters.patched(assessments_data, rows)
+        ))
+    
+    def vocabulary_drift(self) -> float:
+        """
+        Increase in the catalog's out-of-vocabulary token rate since the last full fit
+        
+        Weighted by catalog size, so one edit in a large catalog barely moves it.
+        """
+        baseline = self.vectorizer.fit_tokens if self.vectorizer else None
+        if not self._drift_tokens or not baseline:
+            return 0.0
+        base_total, base_oov = baseline
+        baseline_rate = base_oov / base_total if base_total else 0.0
+        current_rate = (base_oov + self._drift_oov_tokens) / (base_total + self._drift_tokens)
+        return max(0.0, current_rate - baseline_rate)
+    
+    def _track_drift(self, updates: List[Dict]):
+        """Count tokens of incoming assessments that the fitted field vocabularies do not know"""
+        total, oov = self.vectorizer.count_oov(updates)
+        self._drift_tokens += total
+        self._drift_oov_tokens += oov
+    
+    @staticmethod
+    def _stack(vectors, new_vectors):
+        """Append rows to a dense or CSR matrix, returning a new matrix"""
+        if sparse.issparse(vectors):
+            return sparse.vstack([vectors, new_vectors], format='csr')
+        return np.vstack([vectors, new_vectors.toarray()])
+    
+    def _assessment_ids(self) -> List[int]:
+        return self.assessments_data.ids.tolist()
+    
+    def recommend(self, job_role: str, top_k: int = 5, filters: AssessmentFilter = NO_FILTER) -> List[Dict]:
         """
         Recommend top K assessments for a given job role
         
         Args:
             job_role: Job title or description
             top_k: Number of recommendations to return
+            filters: Category, difficulty and duration restrictions
         
         Returns:
             List of recommended assessments with confidence scores
         """
-        if self.assessment_vectors is None:
+        # Read the live model once; a concurrent retrain swaps in a new one
+        snapshot = self._snapshot
+        if snapshot is None:
             raise ValueError("Model not trained. Call train() first.")
         
+        # Serve repeated titles from the cache
+        with span("cache_lookup"):
+            cache_key = (normalize_job_role(job_role), top_k, filters.key(), snapshot.version)
+            cached = self.cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         # Convert job role to vector
-        job_vector = self.vectorizer.transform([job_role])
+        with span("transform"):
+            job_vector = snapshot.vectorizer.transform([job_role])
+        
+        # Get the top K assessments among the rows passing the filters
+        mask = snapshot.filters.mask(filters)
+        top_indices, top_scores = snapshot.index.search(job_vector, top_k, mask)[0]
         
-        # Calculate similarity scores
-        similarity_scores = cosine_similarity(job_vector, self.assessment_vectors)[0]
+        with span("build_results"):
+            recommendations = self._build_recommendations(snapshot, top_indices, top_scores, top_k, mask)
+        self.cache.set(cache_key, recommendations)
+        return list(recommendations)
+    
+    def recommend_batch(self, job_roles: List[str], top_k: int = 5, filters: AssessmentFilter = NO_FILTER) -> List[List[Dict]]:
+        """
+        Recommend top K assessments for many job roles at once
         
-        # Get top K indices
-        top_indices = np.argsort(similarity_scores)[::-1][:top_k]
+        All job roles are transformed in one call and searched together,
+        instead of looping over recommend().
         
-        # Prepare recommendations
-        recommendations = []
-        for idx in top_indices:
-            score = float(similarity_scores[idx])
+        Args:
+            job_roles: Job titles or descriptions
+            top_k: Number of recommendations to return per job role
+            filters: Category, difficulty and duration restrictions for every job role
+        
+        Returns:
+            One list of recommended assessments per job role, in input order
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise ValueError("Model not trained. Call train() first.")
+        
+        mask = snapshot.filters.mask(filters)
+        results = []
+        # Search in chunks so the dense score matrix stays bounded for big catalogs
+        for start in range(0, len(job_roles), BATCH_CHUNK_SIZE):
+            chunk = job_roles[start:start + BATCH_CHUNK_SIZE]
             
+            with span("transform"):
+                job_vectors = snapshot.vectorizer.transform(chunk)
+            hits = snapshot.index.search(job_vectors, top_k, mask)
+            with span("build_results"):
+                for indices, scores in hits:
+                    results.append(self._build_recommendations(snapshot, indices, scores, top_k, mask))
+        
+        return results
+    
+    def _build_recommendations(self, snapshot: ModelSnapshot, top_indices: np.ndarray, top_scores: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None) -> List[Dict]:
+        """Turn ranked indices and their scores into recommendation dicts"""
+        recommendations = []
+        for idx, score in zip(top_indices.tolist(), top_scores.tolist()):
             # Only include if similarity score > 0
             if score > 0:
-                assessment = self.assessments_data[idx].copy()
+                # Each lookup decodes a fresh dict from the columns; only hits are built
+                assessment = snapshot.assessments_data[idx]
                 assessment['confidence_score'] = round(score * 100, 2)  # Convert to percentage
                 assessment['relevance'] = self._get_relevance_label(score)
                 recommendations.append(assessment)
         
         # If no matches found, return top general assessments
         if not recommendations:
-            recommendations = self._get_default_recommendations(top_k)
+            recommendations = self._get_default_recommendations(snapshot, top_k, mask)
         
         return recommendations
     
     def _get_relevance_label(self, score: float) -> str:
         """Convert similarity score to relevance label"""
-        if score >= 0.5:
+        # Per-field scores run lower than the old single-vocabulary cosine; these
+        # bands keep about the same share of High and Medium results
+        if score >= 0.35:
             return "High"
-        elif score >= 0.3:
+        elif score >= 0.2:
             return "Medium"
         else:
             return "Low"
     
-    def _get_default_recommendations(self, top_k: int) -> List[Dict]:
+    def _get_default_recommendations(self, snapshot: ModelSnapshot, top_k: int, mask: Optional[np.ndarray] = None) -> List[Dict]:
         """Return default recommendations when no match found"""
         # Return most common assessments
         defaults = [
@@ -119,24 +491,43 @@ class RecommendationEngine:
         ]
         
         recommendations = []
-        for assessment in self.assessments_data[:top_k]:
+        for idx, assessment in enumerate(snapshot.assessments_data[:top_k]):
+            if mask is not None and not mask[idx]:
+                continue
             if assessment['test_name'] in defaults:
-                assessment_copy = assessment.copy()
-                assessment_copy['confidence_score'] = 50.0
-                assessment_copy['relevance'] = "Medium"
-                recommendations.append(assessment_copy)
+                assessment['confidence_score'] = round(DEFAULT_RECOMMENDATION_SCORE * 100, 2)
+                assessment['relevance'] = self._get_relevance_label(DEFAULT_RECOMMENDATION_SCORE)
+                recommendations.append(assessment)
         
         return recommendations[:top_k]
     
     def get_model_info(self) -> Dict:
         """Return model information and statistics"""
+        snapshot = self._snapshot
+        vectors = snapshot.assessment_vectors if snapshot else None
         return {
-            "model_type": "TF-IDF + Cosine Similarity",
-            "total_assessments": len(self.assessments_data),
-            "feature_dimensions": self.assessment_vectors.shape[1] if self.assessment_vectors is not None else 0,
-            "trained": self.assessment_vectors is not None
+            "model_type": "Per-field TF-IDF + weighted Cosine Similarity",
+            "version": snapshot.version if snapshot else 0,
+            "version_id": snapshot.version_id if snapshot else None,
+            "trained_at": snapshot.trained_at.isoformat() if snapshot else None,
+            "total_assessments": len(snapshot.assessments_data) if snapshot else 0,
+            "feature_dimensions": vectors.shape[1] if vectors is not None else 0,
+            "fields": snapshot.vectorizer.describe() if snapshot else None,
+            "matrix_format": ("dense" if isinstance(vectors, np.ndarray) else "csr") if vectors is not None else None,
+            "index": snapshot.index.describe() if snapshot else None,
+            "filters": snapshot.filters.describe() if snapshot else None,
+            "trained": snapshot is not None,
+            "catalog_hash": snapshot.catalog_hash if snapshot else None,
+            "incremental_updates": self.incremental_updates,
+            "vocabulary_drift": round(self.vocabulary_drift(), 4),
+            "drift_threshold": MODEL_DRIFT_THRESHOLD
         }
 
 
+def _changed_at():
+    """Last change time of an assessment row"""
+    return func.coalesce(Assessment.updated_at, Assessment.created_at)
+
+
 # Global model instance
 recommendation_engine = RecommendationEngine() 
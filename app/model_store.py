@@ -0,0 +1,312 @@
+"""
+Saved model artifacts
+Lets workers load a trained engine from disk instead of refitting at startup.
+
+Each artifact lives in its own directory named after the catalog hash:
+    manifest.json      - format version, catalog hash, vectorizer settings and fit token counts, matrix layout
+    vocabulary/*.json  - TF-IDF vocabulary per field (term -> column within the field block)
+    idf/*.npy          - TF-IDF IDF weights per field
+    matrix*.npy        - normalized assessment matrix (dense, or CSR data/indices/indptr)
+    columns/*          - assessment metadata, one .npy array per column (coded
+                         columns also keep their value table as .json)
+    index/*.npy        - search index arrays (posting lists, transposed matrix, IVF
+                         centroids and cluster lists)
+Every array is a plain .npy file so it can be memory-mapped on load.
+
+In shared mode (MODEL_SHARED_MODE=true) the artifact is built once, by the
+gunicorn master or ml/train_model.py, and every worker memory-maps the
+matrix and metadata read-only, so the OS page cache holds a single copy.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import Assessment
+from app.ml_model import ModelSnapshot, RecommendationEngine
+from app.assessment_store import ColumnarAssessments, ASSESSMENT_FIELDS
+from app.index import build_index, index_name
+from app.vectorizer import TEXT_FIELDS, VECTORIZER_SETTINGS, FieldVectorizer
+
+# Where trained artifacts are written and looked up
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "ml/artifacts")
+# Number of artifact directories kept on disk
+MODEL_ARTIFACTS_KEEP = int(os.getenv("MODEL_ARTIFACTS_KEEP", "3"))
+# Attach workers to one memory-mapped model instead of private copies
+MODEL_SHARED_MODE = os.getenv("MODEL_SHARED_MODE", "false").lower() in ("1", "true", "yes")
+
+# File naming the most recently saved artifact
+LATEST_FILE = "LATEST"
+
+# Bump when the on-disk layout changes so old artifacts are ignored
+ARTIFACT_FORMAT_VERSION = 5
+
+
+def compute_catalog_hash(db: Session) -> str:
+    """SHA-256 over every assessment row plus the model settings"""
+    columns = [getattr(Assessment, field) for field in ASSESSMENT_FIELDS]
+    rows = db.execute(select(*columns).order_by(Assessment.id).execution_options(yield_per=5000))
+    return _hash_rows(list(row) for row in rows)
+
+
+def hash_records(assessments: List[Dict]) -> str:
+    """Catalog hash of assessment dicts ordered by id, matching compute_catalog_hash()"""
+    return _hash_rows([a[field] for field in ASSESSMENT_FIELDS] for a in assessments)
+
+
+def hash_snapshot(snapshot) -> str:
+    """
+    Content hash of a model: its vocabularies and IDFs plus its rows by id
+
+    For incrementally updated snapshots, which have no catalog hash: workers
+    that patched the same rows into the same fitted model get the same hash.
+    """
+    digest = hashlib.sha256()
+    vectorizer = snapshot.vectorizer
+    for field in TEXT_FIELDS:
+        digest.update(json.dumps(sorted(vectorizer.vocabularies[field].items())).encode())
+        digest.update(vectorizer.idfs[field].tobytes())
+    records = sorted(snapshot.assessments_data.to_records(), key=lambda a: a['id'])
+    digest.update(hash_records(records).encode())
+    return digest.hexdigest()
+
+
+def _hash_rows(rows) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'format': ARTIFACT_FORMAT_VERSION,
+        'vectorizer': VECTORIZER_SETTINGS
+    }, sort_keys=True).encode())
+
+    for row in rows:
+        digest.update(json.dumps(row).encode())
+        digest.update(b"\n")
+
+    return digest.hexdigest()
+
+
+def artifact_path(catalog_hash: str, artifact_dir: str = MODEL_ARTIFACT_DIR) -> str:
+    return os.path.join(artifact_dir, catalog_hash)
+
+
+def save_model(
+    engine: RecommendationEngine,
+    catalog_hash: str,
+    artifact_dir: str = MODEL_ARTIFACT_DIR,
+    snapshot: Optional[ModelSnapshot] = None
+) -> str:
+    """
+    Write the trained engine to artifact_dir/<catalog_hash>
+
+    snapshot saves that model instead of the live one; callers that fitted
+    it from the catalog behind catalog_hash pass it, so a snapshot patched
+    since then is never saved under that hash.
+
+    The artifact is written to a temporary directory and renamed into place,
+    so concurrent workers never see a half-written artifact.
+    """
+    final_path = artifact_path(catalog_hash, artifact_dir)
+    if os.path.exists(os.path.join(final_path, "manifest.json")):
+        return final_path
+
+    # Read the live model once so a concurrent swap cannot mix two models
+    if snapshot is None:
+        snapshot = engine.snapshot
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=".tmp-", dir=artifact_dir)
+    try:
+        vectors = snapshot.assessment_vectors
+        if sparse.issparse(vectors):
+            matrix_format = "csr"
+            np.save(os.path.join(tmp_path, "matrix_data.npy"), vectors.data)
+            np.save(os.path.join(tmp_path, "matrix_indices.npy"), vectors.indices)
+            np.save(os.path.join(tmp_path, "matrix_indptr.npy"), vectors.indptr)
+        else:
+            matrix_format = "dense"
+            np.save(os.path.join(tmp_path, "matrix.npy"), np.ascontiguousarray(vectors))
+
+        # Field weights are query-side settings and are not saved
+        os.makedirs(os.path.join(tmp_path, "vocabulary"))
+        os.makedirs(os.path.join(tmp_path, "idf"))
+        for field in TEXT_FIELDS:
+            with open(os.path.join(tmp_path, "vocabulary", f"{field}.json"), "w") as f:
+                json.dump(snapshot.vectorizer.vocabularies[field], f)
+            np.save(os.path.join(tmp_path, "idf", f"{field}.npy"), snapshot.vectorizer.idfs[field])
+
+        snapshot.assessments_data.save(os.path.join(tmp_path, "columns"))
+
+        # Saved index arrays let workers skip rebuilding the index on load
+        index_state = snapshot.index.state() if snapshot.index else {}
+        if index_state:
+            os.makedirs(os.path.join(tmp_path, "index"))
+            for name, values in index_state.items():
+                np.save(os.path.join(tmp_path, "index", f"{name}.npy"), values)
+
+        # Manifest goes last: its presence marks a complete artifact
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump({
+                'format': ARTIFACT_FORMAT_VERSION,
+                'catalog_hash': catalog_hash,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'vectorizer': VECTORIZER_SETTINGS,
+                'fit_tokens': snapshot.vectorizer.fit_tokens,
+                'matrix_format': matrix_format,
+                'shape': list(vectors.shape),
+                'total_assessments': len(snapshot.assessments_data),
+                'index': snapshot.index.describe() if snapshot.index else None,
+                'index_arrays': sorted(index_state)
+            }, f, indent=2)
+
+        try:
+            os.rename(tmp_path, final_path)
+        except OSError:
+            # Another worker saved the same artifact first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    _write_latest(artifact_dir, catalog_hash)
+    _prune_artifacts(artifact_dir, keep=final_path)
+    return final_path
+
+
+def read_latest(artifact_dir: str = MODEL_ARTIFACT_DIR) -> Optional[str]:
+    """Return the catalog hash of the most recently saved artifact"""
+    try:
+        with open(os.path.join(artifact_dir, LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def load_model(
+    engine: RecommendationEngine,
+    catalog_hash: str,
+    artifact_dir: str = MODEL_ARTIFACT_DIR,
+    mmap: bool = True,
+    shared: bool = False
+) -> bool:
+    """
+    Load artifact_dir/<catalog_hash> into the engine; returns False if it does not exist
+
+    The metadata stays in its columns; with shared=True they are memory-mapped
+    read-only even when mmap is False.
+    """
+    path = artifact_path(catalog_hash, artifact_dir)
+    manifest_file = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_file):
+        return False
+
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != ARTIFACT_FORMAT_VERSION:
+        return False
+
+    mmap_mode = 'r' if mmap else None
+
+    def load_array(name):
+        return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+    # Restore the fitted vocabularies without refitting
+    vocabularies, idfs = {}, {}
+    for field in manifest['vectorizer']['fields']:
+        with open(os.path.join(path, "vocabulary", f"{field}.json")) as f:
+            vocabularies[field] = json.load(f)
+        idfs[field] = np.load(os.path.join(path, "idf", f"{field}.npy"))
+    fit_tokens = manifest.get('fit_tokens')
+    vectorizer = FieldVectorizer(vocabularies, idfs, fit_tokens=tuple(fit_tokens) if fit_tokens else None)
+
+    if manifest['matrix_format'] == "csr":
+        vectors = sparse.csr_matrix(
+            (load_array("matrix_data.npy"), load_array("matrix_indices.npy"), load_array("matrix_indptr.npy")),
+            shape=tuple(manifest['shape']),
+            copy=False
+        )
+    else:
+        vectors = load_array("matrix.npy")
+
+    assessments_data = ColumnarAssessments.load(os.path.join(path, "columns"), 'r' if shared else mmap_mode)
+
+    # Reuse (and map) the saved index only if the configured backend builds the same type
+    index_state = None
+    saved_index = manifest.get('index') or {}
+    if manifest.get('index_arrays') and saved_index.get('backend') == index_name(vectors.shape[0]):
+        index_state = {name: load_array(os.path.join("index", f"{name}.npy")) for name in manifest['index_arrays']}
+    index = build_index(vectors, state=index_state)
+
+    engine.load_state(vectorizer, vectors, assessments_data, catalog_hash=catalog_hash, index=index)
+    return True
+
+
+def load_or_train(engine: RecommendationEngine, db: Session, artifact_dir: str = MODEL_ARTIFACT_DIR, force: bool = False) -> str:
+    """
+    Load the saved model for the current catalog, training and saving it only
+    when the catalog hash has changed (or force is set)
+    """
+    started = time.perf_counter()
+    catalog_hash = compute_catalog_hash(db)
+
+    if not force and load_model(engine, catalog_hash, artifact_dir, shared=MODEL_SHARED_MODE):
+        elapsed = time.perf_counter() - started
+        print(f"📦 Loaded model artifact {catalog_hash[:12]} in {elapsed:.2f}s")
+        return catalog_hash
+
+    engine.train(db)
+    engine.catalog_hash = catalog_hash
+
+    try:
+        path = save_model(engine, catalog_hash, artifact_dir)
+        print(f"💾 Saved model artifact to {path}")
+    except OSError as e:
+        print(f"⚠️ Could not save model artifact: {e}")
+        return catalog_hash
+
+    # Swap the private copy for the shared mapping
+    if MODEL_SHARED_MODE:
+        load_model(engine, catalog_hash, artifact_dir, shared=True)
+
+    return catalog_hash
+
+
+def load_for_worker(engine: RecommendationEngine, db: Session, artifact_dir: str = MODEL_ARTIFACT_DIR) -> str:
+    """
+    Worker startup: in shared mode attach to the latest artifact without
+    touching the database, otherwise fall back to load_or_train()
+    """
+    if MODEL_SHARED_MODE:
+        catalog_hash = read_latest(artifact_dir)
+        if catalog_hash and load_model(engine, catalog_hash, artifact_dir, shared=True):
+            print(f"🔗 Attached to shared model artifact {catalog_hash[:12]}")
+            return catalog_hash
+
+    return load_or_train(engine, db, artifact_dir)
+
+
+def _write_latest(artifact_dir: str, catalog_hash: str):
+    """Atomically point LATEST at the given artifact"""
+    tmp_file = os.path.join(artifact_dir, f".{LATEST_FILE}.{os.getpid()}")
+    with open(tmp_file, "w") as f:
+        f.write(catalog_hash)
+    os.replace(tmp_file, os.path.join(artifact_dir, LATEST_FILE))
+
+
+def _prune_artifacts(artifact_dir: str, keep: str):
+    """Delete the oldest artifact directories beyond MODEL_ARTIFACTS_KEEP"""
+    candidates = [
+        os.path.join(artifact_dir, name) for name in os.listdir(artifact_dir)
+        if not name.startswith(".") and os.path.exists(os.path.join(artifact_dir, name, "manifest.json"))
+    ]
+    candidates.sort(key=os.path.getmtime, reverse=True)
+
+    for path in candidates[MODEL_ARTIFACTS_KEEP:]:
+        if os.path.abspath(path) != os.path.abspath(keep):
+            shutil.rmtree(path, ignore_errors=True)
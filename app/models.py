@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -16,6 +16,12 @@ class Assessment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Filtered listings page through id within one category / difficulty
+        Index("ix_assessments_category_id", "category", "id"),
+        Index("ix_assessments_difficulty_level_id", "difficulty_level", "id"),
+    )
+
     def __repr__(self):
         return f"<Assessment {self.test_name}>"
 
@@ -45,5 +51,79 @@ class Recommendation(Base):
     confidence_score = Column(Float, nullable=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_recommendations_timestamp", "timestamp"),
+        Index("ix_recommendations_job_role_timestamp", "job_role", "timestamp"),
+    )
+
+    def __repr__(self):
+        return f"<Recommendation for {self.job_role}>"
+
+
+class RecommendationItem(Base):
+    """Table to store each recommended test of a recommendation, one row per test"""
+    __tablename__ = "recommendation_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    recommendation_id = Column(Integer, ForeignKey("recommendations.id", ondelete="CASCADE"), nullable=False, index=True)
+    rank = Column(Integer, nullable=False)  # 1 = best match
+    test_name = Column(String(255), nullable=False)
+    confidence_score = Column(Float, nullable=True)
+    timestamp = Column(DateTime(timezone=True), nullable=False)  # Copied from the recommendation for range scans
+
+    __table_args__ = (
+        Index("ix_recommendation_items_timestamp", "timestamp"),
+        Index("ix_recommendation_items_test_name_timestamp", "test_name", "timestamp"),
+    )
+
     def __repr__(self):
-        return f"<Recommendation for {self.job_role}>" 
+        return f"<RecommendationItem {self.test_name} rank={self.rank}>"
+
+
+class RecommendationRollup(Base):
+    """Table to store hourly aggregates of recommendation history"""
+    __tablename__ = "recommendation_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    metric = Column(String(20), nullable=False)  # role, test or score
+    key = Column(String(255), nullable=False)  # Job role, test name or score bucket
+    count = Column(Integer, nullable=False)
+    score_sum = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("metric", "hour", "key", name="uq_recommendation_rollups_metric_hour_key"),
+    )
+
+    def __repr__(self):
+        return f"<RecommendationRollup {self.metric} {self.hour} {self.key}>"
+
+
+class JobRoleRecommendation(Base):
+    """Table to store precomputed top-N recommendations per job role and model version"""
+    __tablename__ = "job_role_recommendations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_role_id = Column(Integer, ForeignKey("job_roles.id", ondelete="CASCADE"), nullable=False)
+    model_version = Column(String(64), nullable=False)  # Catalog hash, or version id after incremental updates
+    rank = Column(Integer, nullable=False)  # 1 = best match
+    assessment_id = Column(Integer, ForeignKey("assessments.id", ondelete="CASCADE"), nullable=False)
+    confidence_score = Column(Float, nullable=False)
+    relevance = Column(String(20), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("job_role_id", "model_version", "rank", name="uq_job_role_recommendations_role_version_rank"),
+        Index("ix_job_role_recommendations_version", "model_version"),
+    )
+
+    def __repr__(self):
+        return f"<JobRoleRecommendation role={self.job_role_id} rank={self.rank}>"
+
+
+def create_schema(bind):
+    """Create missing tables, and indexes that create_all skips on tables that already exist"""
+    Base.metadata.create_all(bind=bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
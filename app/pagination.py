@@ -0,0 +1,100 @@
+"""
+Keyset pagination, column projection and ETags for the listing endpoints
+Pages are ordered by id and continue after the last id of the previous page
+(the X-Next-Cursor response header), so every page is an index range scan
+no matter how deep the client reads.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """Columns requested with ?fields=a,b; id is always included because it is the cursor"""
+    if not fields:
+        return list(allowed)
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(allowed)}"
+        )
+    return ['id'] + [f for f in dict.fromkeys(requested) if f != 'id']
+
+
+def list_page(
+    request: Request,
+    db: Session,
+    model,
+    fields: List[str],
+    filters: Dict,
+    after_id: Optional[int],
+    limit: int,
+    changed_at=None
+) -> Response:
+    """
+    One page of model rows after after_id, with only the requested columns
+
+    With a changed_at column the ETag comes from an aggregate over the page
+    (row count, last id, newest change), so a matching If-None-Match returns
+    304 before any row is read or serialized. Without one, the ETag is a hash
+    of the page body and only the transfer is saved. The aggregate is as
+    precise as the database timestamps: PostgreSQL keeps microseconds, while
+    SQLite's CURRENT_TIMESTAMP only has whole seconds.
+    """
+    conditions = [getattr(model, column) == value for column, value in filters.items() if value is not None]
+    if after_id is not None:
+        conditions.append(model.id > after_id)
+
+    def page(*columns):
+        return select(*columns).where(*conditions).order_by(model.id).limit(limit)
+
+    key = [model.__tablename__, fields, sorted((k, v) for k, v in filters.items() if v is not None), after_id, limit]
+
+    etag = None
+    if changed_at is not None:
+        rows = page(model.id, changed_at.label('changed_at')).subquery()
+        count, last_id, newest = db.execute(
+            select(func.count(), func.max(rows.c.id), func.max(rows.c.changed_at))
+        ).one()
+        etag = _etag(key + [count, last_id, str(newest)])
+        if _matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    rows = db.execute(page(*[getattr(model, f) for f in fields])).all()
+    body = jsonable_encoder([dict(zip(fields, row)) for row in rows])
+
+    if etag is None:
+        etag = _etag(key + [body])
+        if _matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    headers = {"ETag": etag}
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = str(rows[-1][0])
+    return JSONResponse(content=body, headers=headers)
+
+
+def _etag(parts) -> str:
+    digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    """If-None-Match check with weak comparison"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,237 @@
+"""
+Precomputed recommendations for known job roles
+Scores every stored JobRole against the catalog once per model version,
+persists the ranked top-N lists and keeps them in memory, so a request for
+a known role (exact or fuzzy name match) is a dictionary lookup.
+"""
+import difflib
+import os
+import threading
+from typing import Dict, List, Optional
+from sqlalchemy import delete
+from app.database import SessionLocal, advisory_lock, conflict_insert
+from app.models import JobRole, JobRoleRecommendation
+from app.ml_model import RecommendationEngine, recommendation_engine, normalize_job_role
+from app.model_store import hash_snapshot
+
+# Length of each stored list; requests for more fall back to live scoring
+PRECOMPUTE_TOP_N = int(os.getenv("PRECOMPUTE_TOP_N", "10"))
+# Minimum difflib similarity for a fuzzy role-name match (1 disables fuzzy matching)
+JOB_ROLE_MATCH_CUTOFF = float(os.getenv("JOB_ROLE_MATCH_CUTOFF", "0.85"))
+# Most stored role names compared per fuzzy match; candidates share a word with the request
+JOB_ROLE_FUZZY_CANDIDATES = int(os.getenv("JOB_ROLE_FUZZY_CANDIDATES", "200"))
+
+
+def model_key(snapshot) -> str:
+    """
+    Identifies the model a list was computed with; shared by workers with the same model
+
+    Fully trained snapshots use their catalog hash. Incrementally updated ones
+    have none and are hashed by content instead of using the per-process
+    version id, so workers that applied the same updates share lists. Hashing
+    reads the whole catalog: only refresh() calls this, never a request.
+    """
+    if snapshot.catalog_hash:
+        return snapshot.catalog_hash
+    return hash_snapshot(snapshot)
+
+
+def role_text(role: JobRole) -> str:
+    """Text scored for a stored job role"""
+    return " ".join(part for part in (role.role_name, role.role_description, role.required_skills) if part)
+
+
+class RoleRecommendations:
+    """In-memory index of precomputed lists, rebuilt whenever the model changes"""
+
+    def __init__(self, engine: RecommendationEngine, session_factory=SessionLocal, top_n: int = PRECOMPUTE_TOP_N):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.top_n = top_n
+        # (model version, model key, {normalized name: role id}, {role id: recommendations},
+        # {word: normalized names containing it}); replaced as a whole
+        self._state = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+
+        # Counters
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def refresh(self, db) -> int:
+        """
+        Make the precomputed lists match the live model
+
+        Reuses rows already stored for this model (e.g. by another worker),
+        otherwise scores every job role in one batch and stores the lists.
+        Workers serialize on an advisory lock, so with several workers
+        starting on the same model only the first one scores the roles.
+        Returns the number of roles indexed.
+        """
+        with self._refresh_lock:
+            snapshot = self.engine.snapshot
+            if snapshot is None:
+                return 0
+            key = model_key(snapshot)
+
+            roles = db.query(JobRole).order_by(JobRole.id).all()
+            role_ids = {role.id for role in roles}
+            stored = self._load_rows(db, key)
+            if role_ids - set(stored):
+                advisory_lock(db, "job_role_recommendations")
+                # Another worker may have stored this model's lists while we waited
+                stored = self._load_rows(db, key)
+                if role_ids - set(stored):
+                    stored = self._compute(db, snapshot, key, roles)
+                else:
+                    db.commit()
+
+            names = {normalize_job_role(role.role_name): role.id for role in roles}
+            lists = {role.id: stored.get(role.id, []) for role in roles}
+            words = {}
+            for name in names:
+                for word in set(name.split()):
+                    words.setdefault(word, []).append(name)
+
+            self._state = (snapshot.version, key, names, lists, words)
+            return len(lists)
+
+    def request_refresh(self):
+        """Refresh in a background thread unless one is already running"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+
+        def run():
+            db = self.session_factory()
+            try:
+                count = self.refresh(db)
+                print(f"📋 Precomputed recommendations ready for {count} job roles")
+            except Exception as e:
+                print(f"❌ Error precomputing job role recommendations: {e}")
+            finally:
+                db.close()
+
+        self._refresh_thread = threading.Thread(target=run, name="role-precompute", daemon=True)
+        self._refresh_thread.start()
+
+    def _load_rows(self, db, key: str) -> Dict[int, List[Dict]]:
+        """Stored lists for a model version, keyed by role id"""
+        rows = (
+            db.query(JobRoleRecommendation)
+            .filter(JobRoleRecommendation.model_version == key)
+            .order_by(JobRoleRecommendation.job_role_id, JobRoleRecommendation.rank)
+            .all()
+        )
+        if not rows:
+            return {}
+
+        assessments = self.engine.assessments_data
+        positions = {assessment_id: i for i, assessment_id in enumerate(assessments.ids.tolist())}
+        stored = {}
+        for row in rows:
+            if row.assessment_id not in positions:
+                # The model changed under us; recompute
+                return {}
+            assessment = assessments[positions[row.assessment_id]]
+            assessment['confidence_score'] = row.confidence_score
+            assessment['relevance'] = row.relevance
+            stored.setdefault(row.job_role_id, []).append(assessment)
+        return stored
+
+    def _compute(self, db, snapshot, key: str, roles: List[JobRole]) -> Dict[int, List[Dict]]:
+        """Score every role against the model, store its lists and drop other models' lists"""
+        batch = self.engine.recommend_batch([role_text(role) for role in roles], top_k=self.top_n)
+        stored = {role.id: recommendations for role, recommendations in zip(roles, batch)}
+
+        rows = [
+            {
+                'job_role_id': role_id,
+                'model_version': key,
+                'rank': rank,
+                'assessment_id': assessment['id'],
+                'confidence_score': assessment['confidence_score'],
+                'relevance': assessment['relevance']
+            }
+            for role_id, recommendations in stored.items()
+            for rank, assessment in enumerate(recommendations, start=1)
+        ]
+
+        # Lists of other models are no longer served; rows this model already has are kept
+        db.execute(delete(JobRoleRecommendation).where(JobRoleRecommendation.model_version != key))
+        if rows:
+            db.execute(conflict_insert(db, JobRoleRecommendation.__table__).on_conflict_do_nothing(), rows)
+        db.commit()
+        return stored
+
+    def lookup(self, job_role: str, top_k: int) -> Optional[List[Dict]]:
+        """
+        Precomputed recommendations for a known job role name, or None
+
+        Returns None when the name matches no stored role, the lists belong to
+        an older model, or top_k is longer than the stored lists.
+        """
+        state = self._current()
+        if state is None or top_k > self.top_n:
+            return None
+        version, key, names, lists, words = state
+
+        name = normalize_job_role(job_role)
+        role_id = names.get(name)
+        if role_id is not None:
+            self.exact_hits += 1
+        elif JOB_ROLE_MATCH_CUTOFF < 1:
+            matches = difflib.get_close_matches(name, self._fuzzy_candidates(name, words), n=1, cutoff=JOB_ROLE_MATCH_CUTOFF)
+            if matches:
+                role_id = names[matches[0]]
+                self.fuzzy_hits += 1
+
+        if role_id is None:
+            self.misses += 1
+            return None
+        return [dict(r) for r in lists[role_id][:top_k]]
+
+    def current_key(self) -> Optional[str]:
+        """
+        Model key of the live model's stored lists, or None until a refresh
+        has computed it; the catalog is never hashed on the caller's thread
+        """
+        state = self._current()
+        return state[1] if state else None
+
+    def _current(self) -> Optional[tuple]:
+        """State of the live model, requesting a refresh if it is missing or stale"""
+        state = self._state
+        if state is None or state[0] != self.engine.model_version:
+            if self.engine.snapshot is not None:
+                self.request_refresh()
+            return None
+        return state
+
+    def _fuzzy_candidates(self, name: str, words: Dict[str, List[str]]) -> List[str]:
+        """
+        Stored names sharing a word with the request, rarest words first, at
+        most JOB_ROLE_FUZZY_CANDIDATES; a typo in every word finds nothing
+        """
+        candidates = {}
+        for word in sorted(set(name.split()), key=lambda w: len(words.get(w, ()))):
+            for candidate in words.get(word, ()):
+                candidates[candidate] = None
+                if len(candidates) >= JOB_ROLE_FUZZY_CANDIDATES:
+                    return list(candidates)
+        return list(candidates)
+
+    def stats(self) -> Dict:
+        state = self._state
+        return {
+            "job_roles": len(state[3]) if state else 0,
+            "model_version": state[0] if state else None,
+            "top_n": self.top_n,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses
+        }
+
+
+# Global precomputed lists for the shared engine
+role_recommendations = RoleRecommendations(recommendation_engine)
@@ -0,0 +1,150 @@
+"""
+Retention for the recommendation history
+Rows older than HISTORY_RETENTION_DAYS, or beyond the newest HISTORY_MAX_ROWS,
+are archived to gzip-compressed NDJSON files and then deleted in small
+batches, one short transaction each, so concurrent inserts are never blocked
+for long. Hourly rollups (app.analytics) are kept, so analytics still cover
+pruned history.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func, or_, select, text
+from sqlalchemy.orm import Session
+from app.models import Recommendation, RecommendationItem
+
+# Retention limits (0 disables a limit)
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "30"))
+HISTORY_MAX_ROWS = int(os.getenv("HISTORY_MAX_ROWS", "1000000"))
+# Rows archived and deleted per transaction
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+# Pause between batches so other writers get the table
+RETENTION_PAUSE_SECONDS = float(os.getenv("RETENTION_PAUSE_SECONDS", "0.05"))
+# Where archive files are written
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "ml/archive")
+
+
+def expired_condition(db: Session, max_age_days: float, max_rows: int):
+    """SQL condition matching expired recommendations, or None if nothing can expire"""
+    conditions = []
+    if max_age_days > 0:
+        conditions.append(Recommendation.timestamp < datetime.now(timezone.utc) - timedelta(days=max_age_days))
+    if max_rows > 0:
+        # Everything at or below the id just past the newest max_rows rows
+        boundary = db.execute(
+            select(Recommendation.id).order_by(Recommendation.id.desc()).offset(max_rows).limit(1)
+        ).scalar()
+        if boundary is not None:
+            conditions.append(Recommendation.id <= boundary)
+    return or_(*conditions) if conditions else None
+
+
+def apply_retention(
+    db: Session,
+    max_age_days: float = HISTORY_RETENTION_DAYS,
+    max_rows: int = HISTORY_MAX_ROWS,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    archive_dir: Optional[str] = RETENTION_ARCHIVE_DIR,
+    dry_run: bool = False,
+    pause_seconds: float = RETENTION_PAUSE_SECONDS
+) -> Dict:
+    """
+    Archive and delete expired recommendation rows in batches
+
+    With dry_run only counts what would expire. With archive_dir=None rows are
+    deleted without an archive. Returns counts and throughput.
+    """
+    started = time.perf_counter()
+    report = {"dry_run": dry_run, "expired": 0, "archived": 0, "deleted": 0, "batches": 0, "archive": None}
+
+    condition = expired_condition(db, max_age_days, max_rows)
+    if condition is None:
+        return _finish(report, started)
+
+    report["expired"] = db.execute(select(func.count()).select_from(Recommendation).where(condition)).scalar()
+    if dry_run or not report["expired"]:
+        return _finish(report, started)
+
+    archive = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        report["archive"] = os.path.join(
+            archive_dir, f"recommendations-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.ndjson.gz"
+        )
+        archive = gzip.open(report["archive"], "wt", encoding="utf-8")
+
+    try:
+        while True:
+            rows = db.execute(
+                select(Recommendation).where(condition).order_by(Recommendation.id).limit(batch_size)
+            ).scalars().all()
+            if not rows:
+                break
+            ids = [row.id for row in rows]
+
+            # Archive first and make sure it reached the file before deleting
+            if archive is not None:
+                _archive_batch(db, archive, rows)
+                archive.flush()
+                report["archived"] += len(rows)
+
+            db.execute(delete(RecommendationItem).where(RecommendationItem.recommendation_id.in_(ids)))
+            db.execute(delete(Recommendation).where(Recommendation.id.in_(ids)))
+            db.commit()
+            report["deleted"] += len(ids)
+            report["batches"] += 1
+
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if archive is not None:
+            archive.close()
+
+    return _finish(report, started)
+
+
+def _archive_batch(db: Session, archive, rows: List[Recommendation]):
+    """Write recommendations and their items as NDJSON lines"""
+    items = {}
+    for item in db.execute(
+        select(RecommendationItem)
+        .where(RecommendationItem.recommendation_id.in_([row.id for row in rows]))
+        .order_by(RecommendationItem.recommendation_id, RecommendationItem.rank)
+    ).scalars():
+        items.setdefault(item.recommendation_id, []).append(
+            {"rank": item.rank, "test_name": item.test_name, "confidence_score": item.confidence_score}
+        )
+
+    archive.write("".join(
+        json.dumps({
+            "id": row.id,
+            "job_role": row.job_role,
+            "recommended_tests": row.recommended_tests,
+            "confidence_score": row.confidence_score,
+            "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+            "items": items.get(row.id, [])
+        }) + "\n"
+        for row in rows
+    ))
+
+
+def vacuum(db: Session):
+    """Reclaim space after a large delete (PostgreSQL only; VACUUM cannot run in a transaction)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM (ANALYZE) {Recommendation.__tablename__}"))
+        conn.execute(text(f"VACUUM (ANALYZE) {RecommendationItem.__tablename__}"))
+
+
+def _finish(report: Dict, started: float) -> Dict:
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["deleted"] / elapsed) if elapsed > 0 else 0
+    return report
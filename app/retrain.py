@@ -0,0 +1,105 @@
+"""
+Background model retraining
+Builds a new model snapshot off the request path and swaps it in atomically,
+so /recommend keeps serving the previous model until the new one is ready
+"""
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from app.database import SessionLocal
+from app.ml_model import RecommendationEngine, recommendation_engine
+from app.model_store import MODEL_ARTIFACT_DIR, hash_records, save_model
+
+
+class RetrainManager:
+    """Runs at most one background retrain at a time and tracks its progress"""
+
+    def __init__(self, engine: RecommendationEngine, session_factory=SessionLocal, artifact_dir: str = MODEL_ARTIFACT_DIR):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.artifact_dir = artifact_dir
+        self._job = None
+        self._lock = threading.Lock()
+
+    def start(self) -> Tuple[Dict, bool]:
+        """
+        Start a retrain in a background thread
+
+        Returns the job and whether it was started now (False if one was already running).
+        """
+        with self._lock:
+            if self._job is not None and self._job['status'] in ("queued", "running"):
+                return dict(self._job), False
+
+            snapshot = self.engine.snapshot
+            job = {
+                "job_id": uuid.uuid4().hex[:12],
+                "status": "queued",
+                "stage": "queued",
+                "progress": 0.0,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "finished_at": None,
+                "error": None,
+                "previous_version_id": snapshot.version_id if snapshot else None,
+                "version_id": None
+            }
+            self._job = job
+            threading.Thread(target=self._run, args=(job,), name="model-retrain", daemon=True).start()
+            return dict(job), True
+
+    def status(self) -> Optional[Dict]:
+        """Return the current or most recent job"""
+        with self._lock:
+            return dict(self._job) if self._job is not None else None
+
+    def _update(self, job: Dict, **fields):
+        with self._lock:
+            job.update(fields)
+
+    def _run(self, job: Dict):
+        db = self.session_factory()
+        try:
+            self._update(job, status="running", stage="loading catalog", progress=0.1)
+            # Edits patched in from here on are not in the fetched catalog
+            fetched_version = self.engine.model_version
+            assessments, synced_at = self.engine.fetch_assessments(db)
+            catalog_hash = hash_records(assessments)
+
+            self._update(job, stage="fitting model", progress=0.3)
+            snapshot = self.engine.build_snapshot(assessments, catalog_hash=catalog_hash)
+
+            self._update(job, stage="swapping model", progress=0.8)
+            if not self.engine.install(snapshot, synced_at=synced_at, expected_version=fetched_version):
+                # Edits landed while fitting; they are committed, so replay them
+                # from the database on top of the new model
+                self._update(job, stage="replaying concurrent edits", progress=0.85)
+                self.engine.install(snapshot, synced_at=synced_at)
+                self.engine.sync(db)
+            version_id = self.engine.snapshot.version_id
+
+            self._update(job, stage="saving artifact", progress=0.9)
+            try:
+                # The fitted snapshot matches catalog_hash; the live one may be patched
+                save_model(self.engine, catalog_hash, self.artifact_dir, snapshot=snapshot)
+            except OSError as e:
+                print(f"⚠️ Could not save model artifact: {e}")
+
+            self._update(
+                job,
+                status="succeeded",
+                stage="done",
+                progress=1.0,
+                version_id=version_id,
+                finished_at=datetime.now(timezone.utc).isoformat()
+            )
+            print(f"✅ Model retrained, now serving version {version_id}")
+        except Exception as e:
+            self._update(job, status="failed", error=str(e), finished_at=datetime.now(timezone.utc).isoformat())
+            print(f"❌ Error retraining model: {e}")
+        finally:
+            db.close()
+
+
+# Global retrain manager for the shared engine
+retrain_manager = RetrainManager(recommendation_engine)
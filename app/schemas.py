@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Annotated
 from datetime import datetime
 
 # Assessment Schemas
@@ -21,6 +21,17 @@ class AssessmentResponse(AssessmentBase):
     class Config:
         from_attributes = True
 
+class AssessmentListItem(BaseModel):
+    """Row of GET /assessments: id plus the ?fields= columns (all by default)"""
+    id: int
+    test_name: Optional[str] = None
+    test_description: Optional[str] = None
+    category: Optional[str] = None
+    skills_assessed: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    difficulty_level: Optional[str] = None
+    created_at: Optional[datetime] = None
+
 
 # Job Role Schemas
 class JobRoleBase(BaseModel):
@@ -39,11 +50,29 @@ class JobRoleResponse(JobRoleBase):
     class Config:
         from_attributes = True
 
+class JobRoleListItem(BaseModel):
+    """Row of GET /job-roles: id plus the ?fields= columns (all by default)"""
+    id: int
+    role_name: Optional[str] = None
+    role_description: Optional[str] = None
+    department: Optional[str] = None
+    required_skills: Optional[str] = None
+    created_at: Optional[datetime] = None
+
 
 # Recommendation Schemas
-class RecommendationRequest(BaseModel):
+MAX_TOP_K = 50
+
+class RecommendationFilters(BaseModel):
+    # Applied before ranking; unset filters match everything
+    category: Optional[str] = Field(None, max_length=100)  # e.g. "Technical" (case-insensitive)
+    difficulty_level: Optional[str] = Field(None, max_length=50)  # e.g. "Medium"
+    min_duration_minutes: Optional[int] = Field(None, ge=0)
+    max_duration_minutes: Optional[int] = Field(None, ge=0)
+
+class RecommendationRequest(RecommendationFilters):
     job_role: str = Field(..., min_length=2, max_length=255)
-    top_k: Optional[int] = Field(5, ge=1, le=10)  # Return top 5 by default
+    top_k: Optional[int] = Field(5, ge=1, le=MAX_TOP_K)  # Return top 5 by default
 
 class RecommendedTest(BaseModel):
     test_name: str
@@ -56,4 +85,28 @@ class RecommendationResponse(BaseModel):
     job_role: str
     recommendations: List[RecommendedTest]
     total_recommendations: int
-    timestamp: datetime 
+    timestamp: datetime
+
+
+# Batch Recommendation Schemas
+class BatchRecommendationRequest(RecommendationFilters):
+    job_roles: List[Annotated[str, Field(min_length=2, max_length=255)]] = Field(..., min_length=1, max_length=1000)
+    top_k: Optional[int] = Field(5, ge=1, le=MAX_TOP_K)
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[RecommendationResponse]
+    total_job_roles: int
+    timestamp: datetime
+
+
+# Precomputed Job Role Recommendation Schemas
+class JobRoleRecommendationsResponse(BaseModel):
+    job_role_id: int
+    role_name: str
+    model_version: str
+    recommendations: List[RecommendedTest]
+    total_recommendations: int
+    computed_at: Optional[datetime] = None
+    
+    class Config:
+        protected_namespaces = ()
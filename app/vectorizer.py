@@ -0,0 +1,217 @@
+"""
+Per-field TF-IDF vectorizer
+Test name, description, skills and category each get their own vocabulary
+and IDF weights, so a skills match is not diluted by incidental words in the
+description. An assessment row is the side-by-side stack of its L2-normalized
+field blocks; a query is transformed once per field and each block is scaled
+by its share of FIELD_WEIGHTS. One dot product therefore gives the weighted
+sum of per-field cosine similarities, between 0 and 1, and the search indexes
+in app.index work on the stacked matrix unchanged. Weights only touch the
+query side: changing FIELD_WEIGHTS needs no refit.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+# Assessment fields with their own vocabulary, in column-block order
+TEXT_FIELDS = ('test_name', 'test_description', 'skills_assessed', 'category')
+
+# Tokenization shared by every field
+TOKENIZER_PARAMS = {
+    'stop_words': 'english',
+    'ngram_range': (1, 2)  # Use unigrams and bigrams
+}
+
+# Largest vocabulary per field, keeping the most frequent terms; smaller catalogs
+# keep every term they contain. Bounds the vector width the indexes work with.
+VOCABULARY_MAX_FEATURES = int(os.getenv("VOCABULARY_MAX_FEATURES", "4000"))
+# From this many assessments on, terms must occur in 2+ rows (drops ids and typos)
+VOCABULARY_MIN_DF_ROWS = int(os.getenv("VOCABULARY_MIN_DF_ROWS", "1000"))
+
+
+def parse_field_weights(spec: str) -> Dict[str, float]:
+    """Parse "skills_assessed=3,test_name=2" into {field: weight}; unlisted fields get 0"""
+    weights = {field: 0.0 for field in TEXT_FIELDS}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        field, _, value = part.partition("=")
+        field = field.strip()
+        if field not in weights:
+            raise ValueError(f"Unknown field in FIELD_WEIGHTS: {field}. Available: {', '.join(TEXT_FIELDS)}")
+        weights[field] = float(value)
+    if sum(weights.values()) <= 0:
+        raise ValueError("FIELD_WEIGHTS must give at least one field a positive weight")
+    return weights
+
+
+# Relative importance of a match in each field
+FIELD_WEIGHTS = parse_field_weights(os.getenv(
+    "FIELD_WEIGHTS", "test_name=2,test_description=1,skills_assessed=3,category=0.5"
+))
+
+# Fit settings, recorded in catalog hashes and saved artifacts
+VECTORIZER_SETTINGS = {
+    'fields': list(TEXT_FIELDS),
+    'tokenizer': TOKENIZER_PARAMS,
+    'max_features': VOCABULARY_MAX_FEATURES,
+    'min_df_rows': VOCABULARY_MIN_DF_ROWS
+}
+
+
+def _analyzer():
+    """The tokenizer every field shares (scikit-learn is imported only here and in fit)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(**TOKENIZER_PARAMS).build_analyzer()
+
+
+def _field_text(assessment: Dict, field: str) -> str:
+    return assessment.get(field) or ""
+
+
+class FieldVectorizer:
+    """Fitted per-field vocabularies and IDF weights, plus the query-side field weights"""
+
+    def __init__(
+        self,
+        vocabularies: Dict[str, Dict[str, int]],
+        idfs: Dict[str, np.ndarray],
+        weights: Optional[Dict[str, float]] = None,
+        analyzer=None,
+        fit_tokens: Optional[Tuple[int, int]] = None
+    ):
+        self.vocabularies = vocabularies
+        self.idfs = {field: np.asarray(idf, dtype=np.float32) for field, idf in idfs.items()}
+        self.analyzer = analyzer or _analyzer()
+        # (tokens, out-of-vocabulary tokens) of the catalog the vocabularies were fitted on
+        self.fit_tokens = fit_tokens
+
+        # Column offset of each field block in the stacked matrix
+        self.offsets = {}
+        offset = 0
+        for field in TEXT_FIELDS:
+            self.offsets[field] = offset
+            offset += len(self.vocabularies[field])
+        self.n_features = offset
+
+        self.weights = dict(weights or FIELD_WEIGHTS)
+        self._query_scales = {field: self.weights.get(field, 0.0) for field in TEXT_FIELDS}
+
+    @classmethod
+    def fit(cls, assessments: Sequence[Dict], weights: Optional[Dict[str, float]] = None) -> Tuple["FieldVectorizer", sparse.csr_matrix]:
+        """Fit one vocabulary per field, sized from the catalog; returns the vectorizer and the assessment matrix"""
+        from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+
+        min_df = 2 if len(assessments) >= VOCABULARY_MIN_DF_ROWS else 1
+        analyzer = _analyzer()
+        vocabularies, idfs, blocks = {}, {}, []
+        # Tokens seen while fitting, and how many the vocabularies kept: the
+        # out-of-vocabulary baseline for drift tracking, without a second pass
+        total = [0]
+
+        def analyze(text):
+            tokens = analyzer(text)
+            total[0] += len(tokens)
+            return tokens
+
+        known = 0
+        for field in TEXT_FIELDS:
+            texts = [_field_text(a, field) for a in assessments]
+            # The two steps of TfidfVectorizer, keeping the term counts in between
+            counter = CountVectorizer(analyzer=analyze, max_features=VOCABULARY_MAX_FEATURES, min_df=min_df, dtype=np.float32)
+            try:
+                counts = counter.fit_transform(texts)
+            except ValueError:
+                # Nothing but stop words (or nothing frequent enough) in this field
+                vocabularies[field], idfs[field] = {}, np.zeros(0, dtype=np.float32)
+                blocks.append(sparse.csr_matrix((len(texts), 0), dtype=np.float32))
+                continue
+            known += int(counts.sum())
+            transformer = TfidfTransformer()
+            blocks.append(transformer.fit_transform(counts))  # Rows are already L2-normalized
+            vocabularies[field] = {term: int(column) for term, column in counter.vocabulary_.items()}
+            idfs[field] = transformer.idf_.astype(np.float32)
+
+        fitted = cls(vocabularies, idfs, weights, analyzer, fit_tokens=(total[0], total[0] - known))
+        return fitted, sparse.hstack(blocks, format='csr', dtype=np.float32)
+
+    def with_weights(self, weights: Dict[str, float]) -> "FieldVectorizer":
+        """Same vocabularies with other field weights"""
+        return FieldVectorizer(self.vocabularies, self.idfs, weights, self.analyzer, self.fit_tokens)
+
+    def transform(self, texts: Iterable[str]) -> sparse.csr_matrix:
+        """
+        Query rows: every text is matched against every field, each block scaled
+        by its weight over the total weight of the fields the text has terms in.
+        Fields the query cannot match do not dilute its score, so a perfect match
+        on every field it touches still scores 1.
+        """
+        return self._vectorize([self.analyzer(text) for text in texts], self._query_scales)
+
+    def transform_assessments(self, assessments: Iterable[Dict]) -> sparse.csr_matrix:
+        """Assessment rows in the fitted vocabularies, each field block L2-normalized"""
+        analyzed = [{field: self.analyzer(_field_text(a, field)) for field in TEXT_FIELDS} for a in assessments]
+        return self._vectorize(analyzed, None)
+
+    def _vectorize(self, analyzed: List, scales: Optional[Dict[str, float]]) -> sparse.csr_matrix:
+        """
+        TF-IDF rows from token lists, identical to TfidfVectorizer.transform per block
+
+        analyzed holds one token list per query (the same tokens for every
+        field) or one {field: tokens} dict per assessment.
+        """
+        indptr, indices, data = [0], [], []
+        nnz = 0
+        for tokens in analyzed:
+            row_start, matched_weight = len(data), 0.0
+            for field in TEXT_FIELDS:
+                scale = 1.0 if scales is None else scales[field]
+                if scale == 0:
+                    continue
+                vocabulary = self.vocabularies[field]
+                counts = {}
+                for token in (tokens[field] if scales is None else tokens):
+                    column = vocabulary.get(token)
+                    if column is not None:
+                        counts[column] = counts.get(column, 0) + 1
+                if not counts:
+                    continue
+
+                columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idfs[field][columns]
+                values *= scale / np.sqrt(np.dot(values, values))
+                indices.append(columns + self.offsets[field])
+                data.append(values)
+                nnz += len(columns)
+                matched_weight += scale
+            if scales is not None:
+                for values in data[row_start:]:
+                    values /= matched_weight
+            indptr.append(nnz)
+
+        return sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+                np.array(indptr, dtype=np.int64)
+            ),
+            shape=(len(analyzed), self.n_features)
+        )
+
+    def count_oov(self, assessments: Iterable[Dict]) -> Tuple[int, int]:
+        """Tokens in the assessments' fields, and how many their field vocabulary does not know"""
+        total = oov = 0
+        for assessment in assessments:
+            for field in TEXT_FIELDS:
+                tokens = self.analyzer(_field_text(assessment, field))
+                vocabulary = self.vocabularies[field]
+                total += len(tokens)
+                oov += sum(1 for token in tokens if token not in vocabulary)
+        return total, oov
+
+    def describe(self) -> Dict:
+        return {
+            field: {"weight": self.weights.get(field, 0.0), "vocabulary": len(self.vocabularies[field])}
+            for field in TEXT_FIELDS
+        }
@@ -0,0 +1,60 @@
+"""
+Synthetic assessment catalogs for benchmarks
+Scales the shape of SAMPLE_ASSESSMENTS to any size with a fixed seed
+"""
+import sys
+sys.path.append('.')
+
+import random
+from typing import Dict, List
+from ml.data.sample_assessments import SAMPLE_ASSESSMENTS, SAMPLE_JOB_ROLES
+
+DURATIONS = [15, 20, 30, 40, 45, 60, 75, 90, 120]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+LEVELS = ["Foundation", "Intermediate", "Advanced", "Expert", "Graduate", "Senior", "Lead", "Specialist"]
+
+
+def _skill_pool() -> List[str]:
+    skills = set()
+    for row in SAMPLE_ASSESSMENTS:
+        skills.update(s.strip() for s in row['skills_assessed'].split(','))
+    for row in SAMPLE_JOB_ROLES:
+        skills.update(s.strip() for s in row['required_skills'].split(','))
+    return sorted(skills)
+
+
+def generate_assessments(n: int, seed: int = 42, with_ids: bool = True) -> List[Dict]:
+    """Return n assessment dicts modelled on SAMPLE_ASSESSMENTS"""
+    rng = random.Random(seed)
+    skills = _skill_pool()
+
+    assessments = []
+    for i in range(n):
+        base = SAMPLE_ASSESSMENTS[i % len(SAMPLE_ASSESSMENTS)]
+        picked = rng.sample(skills, 4)
+        level = rng.choice(LEVELS)
+
+        assessment = {
+            'test_name': f"{level} {base['test_name']} {i + 1}",
+            'test_description': f"{base['test_description']}, with extra focus on {picked[0]} and {picked[1]}",
+            'category': base['category'],
+            'skills_assessed': ", ".join([base['skills_assessed'].split(',')[0].strip()] + picked),
+            'duration_minutes': rng.choice(DURATIONS),
+            'difficulty_level': rng.choice(DIFFICULTIES)
+        }
+        if with_ids:
+            assessment = {'id': i + 1, **assessment}
+        assessments.append(assessment)
+
+    return assessments
+
+
+def sample_queries(n: int, seed: int = 7) -> List[str]:
+    """Return n job-role queries built from SAMPLE_JOB_ROLES"""
+    rng = random.Random(seed)
+    skills = _skill_pool()
+    queries = []
+    for i in range(n):
+        role = SAMPLE_JOB_ROLES[i % len(SAMPLE_JOB_ROLES)]
+        queries.append(f"{rng.choice(LEVELS)} {role['role_name']} {rng.choice(skills)}")
+    return queries
@@ -0,0 +1,161 @@
+"""
+Concurrency benchmark for the DB-backed endpoints
+
+Serves the app in-process with uvicorn against a local SQLite database and
+compares the threadpool-dispatched handlers in app/main.py with the old
+pattern of calling the synchronous Session inside `async def` handlers.
+A delay on every query simulates the network round trip to PostgreSQL.
+
+Usage:
+    python benchmarks/concurrency_benchmark.py --requests 400 --concurrency 32 --db-latency-ms 5
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+ENDPOINTS = ["/assessments", "/assessments/1", "/job-roles", "/stats"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark request concurrency of DB-backed endpoints")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client threads")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="Simulated latency per SQL statement")
+    return parser.parse_args()
+
+
+def build_blocking_app():
+    """The same endpoints as `async def` handlers that call the sync Session on the event loop"""
+    from typing import List as ListType
+    from fastapi import Depends, FastAPI, Request
+    from sqlalchemy.orm import Session
+    from app import main, schemas
+    from app.database import get_db
+
+    blocking_app = FastAPI()
+
+    @blocking_app.get("/assessments", response_model=ListType[schemas.AssessmentResponse])
+    async def get_all_assessments(request: Request, db: Session = Depends(get_db)):
+        return main.get_all_assessments(
+            request, after_id=None, limit=main.DEFAULT_PAGE_SIZE, category=None,
+            difficulty_level=None, fields=None, db=db
+        )
+
+    @blocking_app.get("/assessments/{assessment_id}", response_model=schemas.AssessmentResponse)
+    async def get_assessment(assessment_id: int, db: Session = Depends(get_db)):
+        return main.get_assessment(assessment_id, db)
+
+    @blocking_app.get("/job-roles", response_model=ListType[schemas.JobRoleResponse])
+    async def get_all_job_roles(request: Request, db: Session = Depends(get_db)):
+        return main.get_all_job_roles(request, after_id=None, limit=main.DEFAULT_PAGE_SIZE, fields=None, db=db)
+
+    @blocking_app.get("/stats")
+    async def get_stats(db: Session = Depends(get_db)):
+        return main.get_stats(db)
+
+    return blocking_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app):
+    """Run uvicorn in a background thread and wait until it accepts requests"""
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def run_load(base_url: str, total_requests: int, concurrency: int) -> Dict:
+    """Fire requests round-robin over ENDPOINTS and collect latencies"""
+    def call(i: int) -> float:
+        start = time.perf_counter()
+        with urllib.request.urlopen(base_url + ENDPOINTS[i % len(ENDPOINTS)]) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(call, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "throughput": total_requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    args = parse_args()
+
+    # Point the app at a throwaway SQLite database before it is imported
+    workdir = tempfile.mkdtemp(prefix="shl-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+    from sqlalchemy import event
+    from app.database import engine
+    from app import main as app_main
+
+    # Seed sample data through the regular endpoint handler
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        app_main.seed_database(db)
+    finally:
+        db.close()
+
+    delay = args.db_latency_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def simulate_round_trip(*_):
+        time.sleep(delay)
+
+    print(f"⏱️  {args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.db_latency_ms} ms simulated DB latency\n")
+
+    results = {}
+    for mode, app in [("async def + sync Session", build_blocking_app()), ("threadpool dispatch", app_main.app)]:
+        server, thread, base_url = serve(app)
+        try:
+            run_load(base_url, min(args.requests, 20), args.concurrency)  # warm-up
+            results[mode] = run_load(base_url, args.requests, args.concurrency)
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    print(f"{'mode':<28}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<28}{r['throughput']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+    baseline, threaded = results.values()
+    print(f"\n🚀 Throughput gain: {threaded['throughput'] / baseline['throughput']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
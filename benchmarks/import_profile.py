@@ -0,0 +1,150 @@
+"""
+Cold-start profile: import time of app.main and time until a worker is live and ready
+
+Part one runs `python -X importtime -c "import app.main"` and lists the
+slowest modules (cumulative) and the cost per top-level package. Part two
+starts uvicorn once per STARTUP_MODE against a seeded SQLite database with a
+prebuilt model artifact and polls /health/live and /health/ready.
+
+Usage:
+    python benchmarks/import_profile.py --assessments 100000 --top 20
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile import time and time to live/ready")
+    parser.add_argument("--assessments", type=int, default=10000, help="Synthetic catalog size for the startup test")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed in the import profile")
+    parser.add_argument("--modes", nargs="+", default=["eager", "lazy"], help="STARTUP_MODE values to compare")
+    parser.add_argument("--skip-startup", action="store_true", help="Only profile imports")
+    return parser.parse_args()
+
+
+def import_profile(env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module imported by app.main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def print_import_profile(rows: List[Tuple[str, int, int]], top: int):
+    total = next((cumulative for name, _, cumulative in rows if name == "app.main"), 0)
+    print(f"📦 import app.main: {total / 1e6:.2f}s, {len(rows)} modules\n")
+
+    print(f"{'slowest modules (cumulative)':<48}{'ms':>10}")
+    for name, _, cumulative in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"{name:<48}{cumulative / 1000:>10.1f}")
+
+    packages = {}
+    for name, self_us, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"\n{'package (self time)':<48}{'ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<48}{self_us / 1000:>10.1f}")
+
+
+def seed(workdir: str, assessments: int) -> Dict[str, str]:
+    """Seeded SQLite database and model artifact shared by every startup run"""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{workdir}/startup.db"
+    env["MODEL_ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ.update({key: env[key] for key in ("DATABASE_URL", "MODEL_ARTIFACT_DIR")})
+
+    from app.database import SessionLocal, engine
+    from app.models import create_schema
+    from app.ingest import ingest_catalog
+    from app.ml_model import recommendation_engine
+    from app.model_store import load_or_train
+    from benchmarks.catalog import generate_assessments
+
+    create_schema(engine)
+    db = SessionLocal()
+    try:
+        ingest_catalog(db, assessments=generate_assessments(assessments, with_ids=False))
+        load_or_train(recommendation_engine, db)
+    finally:
+        db.close()
+    return env
+
+
+def wait_for(url: str, deadline: float) -> Optional[float]:
+    """Seconds until url answers 200, or None if the deadline passes"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def startup_times(env: Dict[str, str], mode: str, timeout: float = 120) -> Dict[str, Optional[float]]:
+    from benchmarks.concurrency_benchmark import free_port
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**env, "STARTUP_MODE": mode}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        live = wait_for(base_url + "/health/live", deadline)
+        ready = wait_for(base_url + "/health/ready", deadline)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "live": live - started if live else None,
+        "ready": ready - started if ready else None
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="shl-startup-")
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{workdir}/imports.db")
+    env["STARTUP_MODE"] = "lazy"  # Imports only, no DDL
+    print_import_profile(import_profile(env), args.top)
+
+    if args.skip_startup:
+        return
+
+    print(f"\n⏱️  Seeding {args.assessments} assessments and a model artifact...")
+    env = seed(workdir, args.assessments)
+
+    print(f"\n{'STARTUP_MODE':<16}{'live s':>10}{'ready s':>10}")
+    for mode in args.modes:
+        times = startup_times(env, mode)
+        fmt = lambda value: f"{value:>10.2f}" if value is not None else f"{'timeout':>10}"
+        print(f"{mode:<16}{fmt(times['live'])}{fmt(times['ready'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Index benchmark: recall@k and query latency of each search backend vs exact
+
+Builds a synthetic catalog, fits the model once and searches the same queries
+with the exact index, the inverted index and the IVF index at several nprobe
+settings.
+Recall@k is the share of the exact top-k that the approximate index returns.
+
+Usage:
+    python benchmarks/index_benchmark.py --assessments 500000 --queries 500 --top-k 10
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import time
+from typing import List
+import numpy as np
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare recall and latency of search index backends")
+    parser.add_argument("--assessments", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=500, help="Number of job-role queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Recommendations per query")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF clusters (0 = about 4 * sqrt(catalog size))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="IVF nprobe values to sweep")
+    return parser.parse_args()
+
+
+def timed_search(index, query_vectors, top_k: int):
+    """Search one query at a time, like /recommend does; returns (results, ms per query)"""
+    results = []
+    started = time.perf_counter()
+    for row in range(query_vectors.shape[0]):
+        results.extend(index.search(query_vectors[row], top_k))
+    elapsed = time.perf_counter() - started
+    return results, elapsed * 1000 / query_vectors.shape[0]
+
+
+def recall_at_k(exact: List, approximate: List) -> float:
+    """
+    Mean share of the exact top-k (positive scores only) matched by the approximate index
+
+    A result tied with the exact k-th score counts as a hit, since either
+    assessment is an equally correct answer.
+    """
+    recalls = []
+    for (_, exact_scores), (_, approx_scores) in zip(exact, approximate):
+        relevant = exact_scores[exact_scores > 0]
+        if len(relevant):
+            hits = np.count_nonzero(approx_scores >= relevant[-1] - 1e-6)
+            recalls.append(min(hits, len(relevant)) / len(relevant))
+    return sum(recalls) / len(recalls) if recalls else 1.0
+
+
+def main():
+    args = parse_args()
+
+    # The engine does not need a database here
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    from app.index import ExactIndex, InvertedIndex, IVFIndex
+    from app.ml_model import RecommendationEngine
+    from benchmarks.catalog import generate_assessments, sample_queries
+
+    print(f"🏗️  Building model for {args.assessments} synthetic assessments...")
+    engine = RecommendationEngine().fit(generate_assessments(args.assessments))
+    vectors = engine.assessment_vectors
+    query_vectors = engine.vectorizer.transform(sample_queries(args.queries))
+
+    exact_results, exact_ms = timed_search(ExactIndex(vectors), query_vectors, args.top_k)
+
+    inverted = InvertedIndex(vectors)
+    inverted_results, inverted_ms = timed_search(inverted, query_vectors, args.top_k)
+    touched = inverted.describe()["postings"] / inverted.indptr.shape[0] * query_vectors.getnnz(axis=1).mean()
+    print(f"📊 Inverted index: {touched:.0f} postings touched per query on average")
+
+    started = time.perf_counter()
+    ivf = IVFIndex(vectors, nlist=args.nlist)
+    build_seconds = time.perf_counter() - started
+    print(f"📊 IVF index: {len(ivf.centroids)} clusters built in {build_seconds:.2f}s\n")
+
+    print(f"{'backend':<16}{'ms/query':>10}{'speedup':>10}{f'recall@{args.top_k}':>12}")
+    print(f"{'exact':<16}{exact_ms:>10.3f}{1.0:>10.1f}{1.0:>12.3f}")
+    print(f"{'inverted':<16}{inverted_ms:>10.3f}{exact_ms / inverted_ms:>10.1f}{recall_at_k(exact_results, inverted_results):>12.3f}")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        results, ms = timed_search(ivf, query_vectors, args.top_k)
+        print(f"{f'ivf nprobe={nprobe}':<16}{ms:>10.3f}{exact_ms / ms:>10.1f}{recall_at_k(exact_results, results):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Memory benchmark: assessment metadata as Python dicts vs columnar arrays
+
+Measures with tracemalloc, on a synthetic catalog:
+    footprint    - bytes held by the metadata: a list of dicts (what the
+                   engine used to keep) vs ColumnarAssessments
+    materialize  - time and peak bytes allocated to turn the top-k rows of
+                   a recommendation into result dicts: copies of stored dicts,
+                   rows decoded from the columns (cold, spread over the whole
+                   catalog) and rows served from the decoded-row cache (hot,
+                   drawn from a set smaller than ASSESSMENT_ROW_CACHE_SIZE)
+    recommend    - engine.recommend() latency and peak bytes allocated per
+                   call (cache disabled), with the columnar store
+
+Usage:
+    python benchmarks/metadata_memory_benchmark.py --assessments 100000
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Memory footprint of the engine's assessment metadata")
+    parser.add_argument("--assessments", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--top-k", type=int, default=10, help="Rows materialized per recommendation")
+    parser.add_argument("--queries", type=int, default=2000, help="Recommendations materialized per method")
+    parser.add_argument("--skip-engine", action="store_true", help="Do not fit an engine for the recommend() timing")
+    return parser.parse_args()
+
+
+def measure(build: Callable) -> Tuple[object, int]:
+    """Result of build() and the bytes it still holds afterwards"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, held
+
+
+def per_call(run: Callable, calls: int) -> Dict[str, float]:
+    """Mean microseconds and peak bytes allocated per call"""
+    gc.collect()
+    started = time.perf_counter()
+    for i in range(calls):
+        run(i)
+    seconds = time.perf_counter() - started
+
+    # A second pass under tracemalloc, which slows it down, counts allocations
+    tracemalloc.start()
+    allocated = 0
+    for i in range(calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        run(i)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return {"us": seconds / calls * 1e6, "bytes": allocated / calls}
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    from app.assessment_store import ASSESSMENT_ROW_CACHE_SIZE, ColumnarAssessments
+    from benchmarks.catalog import generate_assessments, sample_queries
+
+    n = args.assessments
+    print(f"📏 {n} assessments\n")
+
+    # Freshly generated dicts own their strings, like rows loaded from the database
+    records, records_bytes = measure(lambda: generate_assessments(n))
+    columns, columns_bytes = measure(lambda: ColumnarAssessments.from_records(records))
+
+    print(f"{'footprint':<28}{'MB':>10}{'bytes/row':>12}")
+    for name, held in (("list of dicts", records_bytes), ("columnar", columns_bytes)):
+        print(f"{name:<28}{held / 2**20:>10.1f}{held / n:>12.0f}")
+    print(f"📉 {records_bytes / max(columns_bytes, 1):.1f}x smaller\n")
+
+    rng = np.random.default_rng(0)
+    hits = rng.integers(0, n, size=(args.queries, args.top_k))
+    hot_rows = rng.choice(n, min(n, max(ASSESSMENT_ROW_CACHE_SIZE // 2, 1)), replace=False)
+    hot_hits = rng.choice(hot_rows, size=(args.queries, args.top_k))
+
+    def legacy(i):
+        results = []
+        for idx in hits[i]:
+            assessment = records[idx].copy()
+            assessment['confidence_score'] = 50.0
+            assessment['relevance'] = "Medium"
+            results.append(assessment)
+        return results
+
+    def lazy(rows):
+        def run(i):
+            results = []
+            for idx in rows[i]:
+                assessment = columns[idx]
+                assessment['confidence_score'] = 50.0
+                assessment['relevance'] = "Medium"
+                results.append(assessment)
+            return results
+        return run
+
+    cold, hot = lazy(hits), lazy(hot_hits)
+    for i in range(args.queries):
+        hot(i)
+
+    print(f"{f'materialize top {args.top_k}':<28}{'us/call':>10}{'peak bytes':>12}")
+    for name, run in (("dict copies", legacy), ("from columns, cold", cold), ("from columns, hot", hot)):
+        result = per_call(run, args.queries)
+        print(f"{name:<28}{result['us']:>10.1f}{result['bytes']:>12.0f}")
+
+    if args.skip_engine:
+        return
+
+    from app.ml_model import RecommendationEngine
+
+    print(f"\n🏗️  Fitting engine on {n} assessments...")
+    records.clear()
+    engine = RecommendationEngine()
+    engine.cache.max_size = 0
+    engine.fit(generate_assessments(n))
+    queries = sample_queries(args.queries)
+    result = per_call(lambda i: engine.recommend(queries[i], top_k=args.top_k), args.queries)
+    print(f"{'recommend()':<28}{result['us']:>10.1f}{result['bytes']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
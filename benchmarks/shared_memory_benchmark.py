@@ -0,0 +1,123 @@
+"""
+Memory benchmark: private model copies vs one shared memory-mapped model
+
+Builds a synthetic catalog, saves it as a model artifact and starts N worker
+processes per mode. Every worker loads the model, serves a few queries and
+reports its memory from /proc/self/smaps_rollup (Linux only):
+    RSS - resident pages, shared pages counted in full by every worker
+    PSS - resident pages with shared pages split between their users
+    USS - pages private to the worker
+PSS/USS show the real cost per worker; their sum is the machine-wide total.
+
+Usage:
+    python benchmarks/shared_memory_benchmark.py --assessments 100000 --workers 4
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+from typing import Dict
+
+MODES = ["imports only", "private copy", "shared mmap"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of private and shared models")
+    parser.add_argument("--assessments", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per mode")
+    return parser.parse_args()
+
+
+def read_memory() -> Dict[str, float]:
+    """RSS, PSS and USS of the current process in MB"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "uss": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)
+    }
+
+
+def worker(mode: str, artifact_dir: str, catalog_hash: str, barrier, results):
+    from app.ml_model import RecommendationEngine
+    from app.model_store import load_model
+    from benchmarks.catalog import sample_queries
+
+    engine = RecommendationEngine()
+    if mode != "imports only":
+        shared = mode == "shared mmap"
+        load_model(engine, catalog_hash, artifact_dir, mmap=shared, shared=shared)
+        for query in sample_queries(50):
+            engine.recommend(query, top_k=10)
+
+    # Measure while every worker of this mode is alive, so shared pages are split fairly
+    barrier.wait()
+    results.put(read_memory())
+    barrier.wait()
+
+
+def run_mode(mode: str, workers: int, artifact_dir: str, catalog_hash: str) -> Dict[str, float]:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+
+    processes = [
+        context.Process(target=worker, args=(mode, artifact_dir, catalog_hash, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    return {
+        key: sum(sample[key] for sample in samples) / workers
+        for key in ("rss", "pss", "uss")
+    }
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("This benchmark needs Linux /proc/self/smaps_rollup")
+
+    # The engine does not need a database here
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    from app.ml_model import RecommendationEngine
+    from app.model_store import save_model
+    from benchmarks.catalog import generate_assessments
+
+    print(f"🏗️  Building model for {args.assessments} synthetic assessments...")
+    engine = RecommendationEngine().fit(generate_assessments(args.assessments))
+    artifact_dir = tempfile.mkdtemp(prefix="shl-artifacts-")
+    catalog_hash = "benchmark"
+    save_model(engine, catalog_hash, artifact_dir)
+    del engine
+
+    results = {mode: run_mode(mode, args.workers, artifact_dir, catalog_hash) for mode in MODES}
+
+    print(f"\nPer-worker memory with {args.workers} workers (MB)")
+    print(f"{'mode':<16}{'RSS':>10}{'PSS':>10}{'USS':>10}{'total PSS':>12}")
+    for mode, r in results.items():
+        print(f"{mode:<16}{r['rss']:>10.1f}{r['pss']:>10.1f}{r['uss']:>10.1f}{r['pss'] * args.workers:>12.1f}")
+
+    base = results["imports only"]["pss"]
+    private = results["private copy"]["pss"] - base
+    shared = results["shared mmap"]["pss"] - base
+    print(f"\n📉 Model memory per worker (PSS above imports): "
+          f"private {private:.1f} MB, shared {shared:.1f} MB ({private / max(shared, 0.1):.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
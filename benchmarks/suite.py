@@ -0,0 +1,319 @@
+"""
+Benchmark suite: micro-benchmarks per catalog size plus an end-to-end load test
+
+For each catalog size (synthetic, see benchmarks/catalog.py) a fresh process
+loads the catalog into SQLite, then times train(), single recommend() calls and
+recommend_batch(). The end-to-end part serves app.main with uvicorn on SQLite
+(a local stand-in for PostgreSQL) and drives a mix of /recommend,
+/recommend/batch, /assessments and /stats. Every case reports p50/p95/p99
+latency, throughput and peak RSS.
+
+Results can be stored as a baseline and later runs compared against it:
+    python benchmarks/suite.py --save-baseline
+    python benchmarks/suite.py --fail-on-regression
+
+Usage:
+    python benchmarks/suite.py --sizes 1000 10000 100000 1000000 --e2e-requests 2000
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# Passes over the queries for recommend_batch()
+BATCH_PASSES = 5
+
+# End-to-end request mix: (weight, method, path)
+E2E_MIX = [
+    (70, "POST", "/recommend"),
+    (10, "POST", "/recommend/batch"),
+    (10, "GET", "/assessments?limit=50"),
+    (10, "GET", "/stats")
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro and end-to-end benchmarks with baseline comparison")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Catalog sizes for the micro-benchmarks")
+    parser.add_argument("--queries", type=int, default=300, help="recommend() calls per size")
+    parser.add_argument("--top-k", type=int, default=10, help="Recommendations per query")
+    parser.add_argument("--batch-size", type=int, default=64, help="Job roles per recommend_batch() call")
+    parser.add_argument("--e2e-size", type=int, default=10000, help="Catalog size for the end-to-end test")
+    parser.add_argument("--e2e-requests", type=int, default=1000, help="Requests in the end-to-end test")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients in the end-to-end test")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only run the micro-benchmarks")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before flagging a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a metric regressed")
+    return parser.parse_args()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float, units: int = None) -> Dict:
+    """Latency percentiles in ms and throughput in units (default: calls) per second"""
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput": round((units if units is not None else len(latencies)) / elapsed, 1)
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def prepare_database(workdir: str, size: int) -> float:
+    """Point the app at a fresh SQLite file and load a synthetic catalog; must run before app imports"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["MODEL_ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["RECOMMEND_CACHE_SIZE"] = "0"  # Measure scoring, not cache hits
+
+    from app.database import SessionLocal, engine
+    from app.models import Base
+    from app.ingest import ingest_catalog
+    from benchmarks.catalog import generate_assessments
+    from ml.data.sample_assessments import SAMPLE_JOB_ROLES
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        report = ingest_catalog(db, assessments=generate_assessments(size, with_ids=False), job_roles=SAMPLE_JOB_ROLES)
+    finally:
+        db.close()
+    return report["assessments"]["seconds"]
+
+
+def micro_case(size: int, queries: int, top_k: int, batch_size: int) -> Dict:
+    """train(), recommend() and recommend_batch() on one catalog size; runs in its own process"""
+    workdir = tempfile.mkdtemp(prefix="shl-suite-")
+    ingest_seconds = prepare_database(workdir, size)
+
+    from app.database import SessionLocal
+    from app.ml_model import RecommendationEngine
+    from benchmarks.catalog import generate_assessments, sample_queries
+
+    # Training imports scikit-learn lazily; a throwaway fit keeps that out of train_seconds
+    RecommendationEngine().fit(generate_assessments(100))
+
+    engine = RecommendationEngine()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        engine.train(db)
+        train_seconds = time.perf_counter() - started
+    finally:
+        db.close()
+
+    job_roles = sample_queries(queries)
+    for query in job_roles[:10]:
+        engine.recommend(query, top_k=top_k)  # warm-up
+
+    latencies = []
+    started = time.perf_counter()
+    for query in job_roles:
+        call_started = time.perf_counter()
+        engine.recommend(query, top_k=top_k)
+        latencies.append(time.perf_counter() - call_started)
+    recommend = summarize(latencies, time.perf_counter() - started)
+
+    # A few passes, so the batch percentiles rest on more than a handful of calls
+    batch_latencies = []
+    started = time.perf_counter()
+    for _ in range(BATCH_PASSES):
+        for start in range(0, len(job_roles), batch_size):
+            call_started = time.perf_counter()
+            engine.recommend_batch(job_roles[start:start + batch_size], top_k=top_k)
+            batch_latencies.append(time.perf_counter() - call_started)
+    recommend_batch = summarize(batch_latencies, time.perf_counter() - started, units=BATCH_PASSES * len(job_roles))
+
+    return {
+        "ingest_seconds": round(ingest_seconds, 3),
+        "train_seconds": round(train_seconds, 3),
+        "recommend": recommend,
+        "recommend_batch": recommend_batch,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def e2e_case(size: int, total_requests: int, concurrency: int, top_k: int) -> Dict:
+    """Serve app.main on SQLite and drive the request mix; runs in its own process"""
+    workdir = tempfile.mkdtemp(prefix="shl-suite-")
+    prepare_database(workdir, size)
+
+    from app import main as app_main
+    from benchmarks.catalog import sample_queries
+    from benchmarks.concurrency_benchmark import serve
+
+    server, thread, base_url = serve(app_main.app)
+    job_roles = sample_queries(total_requests)
+    rng = random.Random(11)
+    plan = rng.choices(E2E_MIX, weights=[weight for weight, _, _ in E2E_MIX], k=total_requests)
+
+    def call(i: int):
+        _, method, path = plan[i]
+        body = None
+        if path == "/recommend":
+            body = {"job_role": job_roles[i], "top_k": top_k}
+        elif path == "/recommend/batch":
+            body = {"job_roles": job_roles[i:i + 8], "top_k": top_k}
+
+        request = urllib.request.Request(base_url + path, method=method)
+        if body is not None:
+            request.data = json.dumps(body).encode()
+            request.add_header("Content-Type", "application/json")
+
+        started = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return path, time.perf_counter() - started
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(call, range(min(50, total_requests))))  # warm-up
+            started = time.perf_counter()
+            samples = list(pool.map(call, range(total_requests)))
+            elapsed = time.perf_counter() - started
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    results = {"all": summarize([latency for _, latency in samples], elapsed)}
+    for _, _, path in E2E_MIX:
+        latencies = [latency for p, latency in samples if p == path]
+        if latencies:
+            # Throughput per endpoint is its share of the same wall-clock window
+            results[path.split("?")[0]] = summarize(latencies, elapsed)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def run_isolated(target, *args) -> Dict:
+    """Run one case in a fresh process, so imports, caches and peak RSS do not leak between cases"""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(target, args)
+
+
+def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Print current vs baseline per metric; returns the metrics that regressed"""
+    current_flat, baseline_flat = flatten(current), flatten(baseline)
+    regressions = []
+
+    print(f"\n{'metric':<52}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, value in current_flat.items():
+        if name not in baseline_flat or not baseline_flat[name]:
+            continue
+        before = baseline_flat[name]
+        change = (value - before) / before
+        # Throughput should go up; times and memory should go down
+        worse = -change if name.endswith("throughput") else change
+        flag = ""
+        if worse > tolerance:
+            flag = " ⚠️"
+            regressions.append(name)
+        elif worse < -tolerance:
+            flag = " 🚀"
+        print(f"{name:<52}{before:>12.3f}{value:>12.3f}{change:>+8.0%}{flag}")
+    return regressions
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "recorded_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def main():
+    args = parse_args()
+    results = {"micro": {}, "e2e": {}}
+
+    for size in args.sizes:
+        print(f"⏱️  Micro-benchmarks, {size} assessments...")
+        case = run_isolated(micro_case, size, args.queries, args.top_k, args.batch_size)
+        results["micro"][str(size)] = case
+        print(f"   train {case['train_seconds']:.2f}s | recommend p50 {case['recommend']['p50_ms']:.2f} ms, "
+              f"p99 {case['recommend']['p99_ms']:.2f} ms, {case['recommend']['throughput']:.0f}/s | "
+              f"batch {case['recommend_batch']['throughput']:.0f} roles/s | peak RSS {case['peak_rss_mb']:.0f} MB")
+
+    if not args.skip_e2e:
+        print(f"⏱️  End-to-end, {args.e2e_size} assessments, {args.e2e_requests} requests, concurrency {args.concurrency}...")
+        case = run_isolated(e2e_case, args.e2e_size, args.e2e_requests, args.concurrency, args.top_k)
+        results["e2e"][str(args.e2e_size)] = case
+        print(f"\n{'endpoint':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for endpoint, r in case.items():
+            if isinstance(r, dict):
+                print(f"{endpoint:<22}{r['throughput']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+        print(f"peak RSS {case['peak_rss_mb']:.0f} MB")
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Compared with {args.baseline} (commit {baseline['environment'].get('commit')}, "
+              f"{baseline['environment'].get('cpus')} CPUs)")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+        else:
+            print("\n✅ No regressions")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
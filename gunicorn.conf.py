@@ -0,0 +1,33 @@
+"""
+Gunicorn settings
+Run with: gunicorn -c gunicorn.conf.py app.main:app
+
+With MODEL_SHARED_MODE=true the master builds the model artifact once
+before forking, and every worker memory-maps the same files read-only
+instead of training its own copy.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    """Build the shared model artifact in the master process"""
+    from app.model_store import MODEL_SHARED_MODE, load_or_train
+    if not MODEL_SHARED_MODE:
+        return
+
+    from app.database import SessionLocal, engine
+    from app.ml_model import RecommendationEngine
+
+    db = SessionLocal()
+    try:
+        load_or_train(RecommendationEngine(), db)
+    except Exception as e:
+        server.log.warning(f"Could not build shared model artifact: {e}")
+    finally:
+        db.close()
+        # Workers must not inherit the master's pooled connections
+        engine.dispose()
@@ -0,0 +1,64 @@
+"""
+Offline bulk recommendations
+Reads job roles from a local CSV or NDJSON file and writes NDJSON results,
+one line per input row, streaming in fixed-size chunks
+
+Usage:
+    python ml/batch_recommend.py roles.csv --output results.ndjson --top-k 5
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import contextlib
+import time
+from app.bulk import BULK_CHUNK_SIZE, detect_format, read_job_roles, stream_recommendations
+from app.database import SessionLocal
+from app.ml_model import recommendation_engine
+from app.model_store import load_or_train, MODEL_ARTIFACT_DIR
+
+
+def main():
+    """Main bulk recommendation function"""
+    parser = argparse.ArgumentParser(description="Recommend assessments for a file of job roles")
+    parser.add_argument("input", help="CSV or NDJSON file of job roles ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Input format (default: from the file extension)")
+    parser.add_argument("--top-k", type=int, default=5, help="Recommendations per job role")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Job roles scored per batch")
+    parser.add_argument("--artifact-dir", default=MODEL_ARTIFACT_DIR, help="Directory for model artifacts")
+    args = parser.parse_args()
+
+    # Progress goes to stderr so stdout can carry the results
+    db = SessionLocal()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            load_or_train(recommendation_engine, db, artifact_dir=args.artifact_dir)
+    except Exception as e:
+        print(f"❌ Error loading model: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    fmt = args.format or detect_format(args.input)
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    started = time.perf_counter()
+    rows = 0
+    try:
+        for lines in stream_recommendations(recommendation_engine, read_job_roles(source, fmt), args.top_k, args.chunk_size):
+            target.write(lines)
+            rows += lines.count("\n")
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote recommendations for {rows} job roles in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
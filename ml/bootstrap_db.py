@@ -0,0 +1,33 @@
+"""
+Database bootstrap
+Creates missing tables and indexes. Run it once per deploy (e.g. as the
+release or pre-deploy command) when workers start with STARTUP_MODE=lazy,
+which skips DDL at import time.
+
+Usage:
+    python ml/bootstrap_db.py
+"""
+import sys
+sys.path.append('.')
+
+import time
+from app.database import engine
+from app.models import Base, create_schema
+
+
+def main():
+    """Main bootstrap function"""
+    print("🏗️  Creating database schema...\n")
+
+    started = time.perf_counter()
+    try:
+        create_schema(engine)
+    except Exception as e:
+        print(f"\n❌ Error creating schema: {e}")
+        sys.exit(1)
+
+    print(f"✅ {len(Base.metadata.tables)} tables ready in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
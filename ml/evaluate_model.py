@@ -0,0 +1,130 @@
+"""
+Offline relevance evaluation
+Scores every sample job role against the catalog and reports precision@k and
+scoring latency. An assessment counts as relevant to a job role when it tests
+at least one of the role's required_skills. Compares the single 100-term
+TF-IDF model the engine used before with the per-field model under one or
+more FIELD_WEIGHTS settings.
+
+Usage:
+    python ml/evaluate_model.py --k 3 5
+    python ml/evaluate_model.py --weights "skills_assessed=3,test_name=2" "skills_assessed=1,test_description=1"
+    python ml/evaluate_model.py --assessments 100000 --query title
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import time
+from typing import Callable, Dict, List, Set
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.index import build_index
+from app.vectorizer import FIELD_WEIGHTS, FieldVectorizer, parse_field_weights
+from ml.data.sample_assessments import SAMPLE_ASSESSMENTS, SAMPLE_JOB_ROLES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precision@k and latency of the recommendation model")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 5], help="Cut-offs for precision@k")
+    parser.add_argument("--weights", nargs="+", default=[], help="FIELD_WEIGHTS settings to compare (default: the configured one)")
+    parser.add_argument("--query", choices=["title", "title+description"], default="title+description", help="Job role text used as the query")
+    parser.add_argument("--assessments", type=int, default=0, help="Synthetic catalog size (0 = the sample catalog)")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed passes over the queries")
+    return parser.parse_args()
+
+
+def skill_set(text: str) -> Set[str]:
+    return {skill.strip().lower() for skill in (text or "").split(",") if skill.strip()}
+
+
+def relevant_sets(assessments: List[Dict]) -> List[Set[int]]:
+    """Rows of the catalog sharing at least one required skill with each job role"""
+    skills = [skill_set(a['skills_assessed']) for a in assessments]
+    return [
+        {row for row, assessment_skills in enumerate(skills) if assessment_skills & skill_set(role['required_skills'])}
+        for role in SAMPLE_JOB_ROLES
+    ]
+
+
+def legacy_scorer(assessments: List[Dict]) -> Callable:
+    """The previous model: one TF-IDF (100 terms) over the concatenated fields"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import normalize
+
+    def combined(a):
+        return f"{a['test_name']} {a['test_description']} {a['skills_assessed']} {a['category']}"
+
+    vectorizer = TfidfVectorizer(max_features=100, stop_words='english', ngram_range=(1, 2))
+    vectors = normalize(vectorizer.fit_transform([combined(a) for a in assessments])).astype(np.float32)
+    index = build_index(vectors, backend="exact")
+    return lambda queries, k: index.search(vectorizer.transform(queries), k)
+
+
+def field_scorer(vectorizer: FieldVectorizer, index) -> Callable:
+    return lambda queries, k: index.search(vectorizer.transform(queries), k)
+
+
+def evaluate(name: str, scorer: Callable, queries: List[str], relevant: List[Set[int]], ks: List[int], repeat: int) -> Dict:
+    results = {"model": name}
+    top = max(ks)
+    # Like the engine, only positive scores count as matches; an empty slot is a miss
+    hits = [indices[scores > 0] for indices, scores in scorer(queries, top)]
+    for k in ks:
+        results[f"p@{k}"] = float(np.mean([
+            len(set(indices[:k].tolist()) & relevant_rows) / k
+            for indices, relevant_rows in zip(hits, relevant)
+        ]))
+
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            scorer([query], top)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    results["p50_ms"] = latencies[len(latencies) // 2] * 1000
+    results["p95_ms"] = latencies[int(len(latencies) * 0.95)] * 1000
+    return results
+
+
+def main():
+    args = parse_args()
+
+    if args.assessments:
+        from benchmarks.catalog import generate_assessments
+        assessments = generate_assessments(args.assessments)
+    else:
+        assessments = [{'id': i + 1, **a} for i, a in enumerate(SAMPLE_ASSESSMENTS)]
+
+    queries = [
+        role['role_name'] if args.query == "title" else f"{role['role_name']} {role['role_description']}"
+        for role in SAMPLE_JOB_ROLES
+    ]
+    relevant = relevant_sets(assessments)
+
+    print(f"📏 {len(assessments)} assessments, {len(queries)} job roles, query = {args.query}\n")
+
+    started = time.perf_counter()
+    vectorizer, vectors = FieldVectorizer.fit(assessments)
+    index = build_index(vectors)
+    print(f"🤖 Per-field model fitted in {time.perf_counter() - started:.2f}s, {vectors.shape[1]} features\n")
+
+    runs = [evaluate("single TF-IDF (100 terms)", legacy_scorer(assessments), queries, relevant, args.k, args.repeat)]
+    settings = args.weights or [",".join(f"{field}={weight:g}" for field, weight in FIELD_WEIGHTS.items())]
+    for spec in settings:
+        weighted = vectorizer.with_weights(parse_field_weights(spec))
+        runs.append(evaluate(spec, field_scorer(weighted, index), queries, relevant, args.k, args.repeat))
+
+    columns = [f"p@{k}" for k in args.k] + ["p50_ms", "p95_ms"]
+    width = max(len(run["model"]) for run in runs) + 2
+    print(f"{'model':<{width}}" + "".join(f"{column:>10}" for column in columns))
+    for run in runs:
+        print(f"{run['model']:<{width}}" + "".join(f"{run[column]:>10.3f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Bulk catalog loader
+Upserts assessments and job roles from CSV, JSON or NDJSON files in
+batches, then rebuilds the recommendation model once if the catalog changed.
+Safe to re-run: rows are matched on test_name / role_name.
+
+Usage:
+    python ml/ingest_catalog.py --assessments assessments.csv --job-roles roles.ndjson
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+from app.database import SessionLocal, engine
+from app.models import create_schema
+from app.ingest import INGEST_BATCH_SIZE, ingest_catalog, read_records
+from app.ml_model import recommendation_engine
+from app.model_store import load_or_train, MODEL_ARTIFACT_DIR
+
+
+def main():
+    """Main ingestion function"""
+    parser = argparse.ArgumentParser(description="Bulk load assessments and job roles")
+    parser.add_argument("--assessments", help="CSV, JSON or NDJSON file of assessments")
+    parser.add_argument("--job-roles", help="CSV, JSON or NDJSON file of job roles")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Rows per upsert statement")
+    parser.add_argument("--artifact-dir", default=MODEL_ARTIFACT_DIR, help="Directory for model artifacts")
+    parser.add_argument("--no-train", action="store_true", help="Skip rebuilding the model after loading")
+    args = parser.parse_args()
+
+    if not args.assessments and not args.job_roles:
+        parser.error("nothing to load: pass --assessments and/or --job-roles")
+
+    print("📥 Starting catalog ingestion...\n")
+    create_schema(engine)
+
+    db = SessionLocal()
+    try:
+        report = ingest_catalog(
+            db,
+            assessments=read_records(args.assessments) if args.assessments else None,
+            job_roles=read_records(args.job_roles) if args.job_roles else None,
+            batch_size=args.batch_size
+        )
+
+        for table, counts in report.items():
+            print(f"✅ {table}: {counts['rows']} rows in {counts['seconds']:.2f}s "
+                  f"({counts['rows_per_second']} rows/s) - {counts['written']} written, "
+                  f"{counts['unchanged']} unchanged, {counts['skipped']} skipped")
+
+        # One rebuild for the whole load; a no-op when nothing changed
+        if not args.no_train and args.assessments:
+            load_or_train(recommendation_engine, db, artifact_dir=args.artifact_dir)
+    except Exception as e:
+        print(f"\n❌ Error during ingestion: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
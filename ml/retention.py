@@ -0,0 +1,66 @@
+"""
+Recommendation history retention
+Archives recommendations older than the retention window (or beyond the row
+cap) to gzip NDJSON and deletes them in small batches. Run it from cron.
+
+Usage:
+    python ml/retention.py --dry-run
+    python ml/retention.py --max-age-days 30 --max-rows 1000000 --vacuum
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+from app.database import SessionLocal
+from app.retention import (
+    HISTORY_MAX_ROWS, HISTORY_RETENTION_DAYS, RETENTION_ARCHIVE_DIR, RETENTION_BATCH_SIZE,
+    apply_retention, vacuum
+)
+
+
+def main():
+    """Main retention function"""
+    parser = argparse.ArgumentParser(description="Archive and prune old recommendation history")
+    parser.add_argument("--max-age-days", type=float, default=HISTORY_RETENTION_DAYS, help="Keep rows newer than this (0 = no age limit)")
+    parser.add_argument("--max-rows", type=int, default=HISTORY_MAX_ROWS, help="Keep at most this many newest rows (0 = no cap)")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE, help="Rows archived and deleted per transaction")
+    parser.add_argument("--archive-dir", default=RETENTION_ARCHIVE_DIR, help="Directory for gzip NDJSON archives")
+    parser.add_argument("--no-archive", action="store_true", help="Delete without writing an archive")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would expire")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the history tables afterwards (PostgreSQL)")
+    args = parser.parse_args()
+
+    print("🧹 Applying recommendation history retention...\n")
+
+    db = SessionLocal()
+    try:
+        report = apply_retention(
+            db,
+            max_age_days=args.max_age_days,
+            max_rows=args.max_rows,
+            batch_size=args.batch_size,
+            archive_dir=None if args.no_archive else args.archive_dir,
+            dry_run=args.dry_run
+        )
+
+        if args.dry_run:
+            print(f"🔍 Dry run: {report['expired']} rows would be archived and deleted")
+            return
+
+        print(f"✅ Deleted {report['deleted']} of {report['expired']} expired rows in {report['batches']} batches, "
+              f"{report['seconds']:.2f}s ({report['rows_per_second']} rows/s)")
+        if report["archive"]:
+            print(f"📦 Archived {report['archived']} rows to {report['archive']}")
+
+        if args.vacuum and report["deleted"]:
+            vacuum(db)
+            print("✅ Vacuumed history tables")
+    except Exception as e:
+        print(f"\n❌ Error applying retention: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,49 +3,33 @@ sys.path.append('.')
 
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine
-from app.models import Assessment, JobRole, Base
+from app.models import Assessment, JobRole, create_schema
+from app.ingest import upsert_assessments, upsert_job_roles
 from ml.data.sample_assessments import SAMPLE_ASSESSMENTS, SAMPLE_JOB_ROLES
 
 def seed_assessments(db: Session):
     """Add sample assessments to database"""
     print("Seeding assessments...")
     
-    # Check if data already exists
-    existing_count = db.query(Assessment).count()
-    if existing_count > 0:
-        print(f"Database already has {existing_count} assessments. Skipping...")
-        return
-    
-    # Add assessments
-    for assessment_data in SAMPLE_ASSESSMENTS:
-        assessment = Assessment(**assessment_data)
-        db.add(assessment)
-    
-    db.commit()
-    print(f"✅ Added {len(SAMPLE_ASSESSMENTS)} assessments!")
+    # Upsert on test_name, so re-running only touches changed rows
+    report = upsert_assessments(db, SAMPLE_ASSESSMENTS)
+    print(f"✅ Assessments: {report['written']} written, {report['unchanged']} unchanged")
 
 def seed_job_roles(db: Session):
     """Add sample job roles to database"""
     print("Seeding job roles...")
     
-    # Check if data already exists
-    existing_count = db.query(JobRole).count()
-    if existing_count > 0:
-        print(f"Database already has {existing_count} job roles. Skipping...")
-        return
-    
-    # Add job roles
-    for role_data in SAMPLE_JOB_ROLES:
-        role = JobRole(**role_data)
-        db.add(role)
-    
-    db.commit()
-    print(f"✅ Added {len(SAMPLE_JOB_ROLES)} job roles!")
+    # Upsert on role_name, so re-running only touches changed rows
+    report = upsert_job_roles(db, SAMPLE_JOB_ROLES)
+    print(f"✅ Job roles: {report['written']} written, {report['unchanged']} unchanged")
 
 def main():
     """Main seeding function"""
     print("🌱 Starting database seeding...\n")
     
+    # Make sure the tables exist
+    create_schema(engine)
+    
     # Create database session
     db = SessionLocal()
     
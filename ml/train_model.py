@@ -1 +1,41 @@
- 
+"""
+Offline model trainer
+Fits the recommendation engine from the database and saves the artifact
+that app workers load at startup instead of refitting
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+from app.database import SessionLocal
+from app.ml_model import recommendation_engine
+from app.model_store import load_or_train, MODEL_ARTIFACT_DIR
+
+
+def main():
+    """Main training function"""
+    parser = argparse.ArgumentParser(description="Train and save the recommendation model")
+    parser.add_argument("--artifact-dir", default=MODEL_ARTIFACT_DIR, help="Directory for model artifacts")
+    parser.add_argument("--force", action="store_true", help="Retrain even if an artifact for this catalog exists")
+    args = parser.parse_args()
+
+    print("🤖 Starting offline training...\n")
+
+    db = SessionLocal()
+    try:
+        catalog_hash = load_or_train(recommendation_engine, db, artifact_dir=args.artifact_dir, force=args.force)
+        info = recommendation_engine.get_model_info()
+
+        print("\n📊 Model Summary:")
+        print(f"   - Catalog Hash: {catalog_hash}")
+        print(f"   - Total Assessments: {info['total_assessments']}")
+        print(f"   - Feature Dimensions: {info['feature_dimensions']}")
+    except Exception as e:
+        print(f"\n❌ Error during training: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# app.database connects on import; the tests never touch the database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,65 @@
+import io
+import json
+from app.bulk import read_job_roles, stream_recommendations
+
+
+class StubEngine:
+    """Returns one recommendation per job role, named after it"""
+
+    def recommend_batch(self, job_roles, top_k=5):
+        return [
+            [{
+                'test_name': f"Test for {role}",
+                'test_description': None,
+                'category': "Technical",
+                'confidence_score': 50.0,
+                'skills_assessed': None
+            }]
+            for role in job_roles
+        ]
+
+
+def export(data: bytes, fmt: str):
+    lines = stream_recommendations(StubEngine(), read_job_roles(io.BytesIO(data), fmt))
+    return [json.loads(line) for line in "".join(lines).splitlines()]
+
+
+def test_ndjson_invalid_utf8_line_is_reported_and_export_continues():
+    data = b'{"job_role": "Data Scientist"}\n{"job_role": "Caf\xe9 Manager"}\n"Backend Developer"\n'
+    results = export(data, "ndjson")
+
+    assert [r["row"] for r in results] == [1, 2, 3]
+    assert results[0]["recommendations"][0]["test_name"] == "Test for Data Scientist"
+    assert results[1] == {"row": 2, "job_role": None, "error": "invalid UTF-8"}
+    assert results[2]["job_role"] == "Backend Developer"
+
+
+def test_ndjson_invalid_json_line_is_reported():
+    data = b'{"job_role": "Data Scientist"\n{"job_role": "Sales Manager"}\n'
+    results = export(data, "ndjson")
+
+    assert results[0] == {"row": 1, "job_role": None, "error": "invalid JSON"}
+    assert results[1]["job_role"] == "Sales Manager"
+
+
+def test_ndjson_bom_and_missing_role():
+    data = '﻿"Data Scientist"\n{"department": "Sales"}\n'.encode("utf-8")
+    results = export(data, "ndjson")
+
+    assert results[0]["job_role"] == "Data Scientist"
+    assert results[1]["error"] == "job_role must be 2-255 characters"
+
+
+def test_csv_invalid_utf8_row_is_reported():
+    data = b"job_role,department\nData Scientist,Data\nCaf\xe9 Manager,Food\n\"Backend, API\",Engineering\n"
+    results = export(data, "csv")
+
+    assert [r["row"] for r in results] == [1, 2, 3]
+    assert results[0]["job_role"] == "Data Scientist"
+    assert results[1] == {"row": 2, "job_role": None, "error": "invalid UTF-8"}
+    assert results[2]["job_role"] == "Backend, API"
+
+
+def test_csv_without_header_reads_first_column():
+    results = export(b"Data Scientist\nSales Manager\n", "csv")
+    assert [r["job_role"] for r in results] == ["Data Scientist", "Sales Manager"]